@@ -1,21 +1,66 @@
+import time
+_STARTED = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox, font, simpledialog
+from tkinter import ttk, messagebox, font, simpledialog, filedialog
 from tracker import FinanceTracker
-from visualization import create_spending_heatmap, create_spending_sparkline
-import matplotlib
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from insights import Insights
+from forecast import HORIZON_MONTHS, forecast
+from virtual_tree import VirtualTreeview
+from worker import BackgroundWorker, Job
+from instrumentation import install_from_env, metrics, startup
+import base64
+import importlib
+import os
+import sys
+import threading
 from datetime import datetime
 
-# Set matplotlib backend
-matplotlib.use('TkAgg')
+# matplotlib/pandas (visualization) and dateparser (nlp_queries) are
+# imported on first use, off the Tk thread, so the window comes up first
+startup.start(_STARTED)
+startup.mark('imports')
+
+# How often due recurring bills are applied while the app is running
+RECURRING_CHECK_MS = 10 * 60 * 1000
+# Full rewrites of the ledger triggered within this many seconds share one write
+SAVE_DELAY = 0.5
 
 class FinanceTrackerApp:
     def __init__(self, root):
         self.root = root
-        self.tracker = FinanceTracker()
+        self.metrics_path = install_from_env()
+        self.tracker = FinanceTracker(sharded=True, recent_months=3, save_delay=SAVE_DELAY,
+                                      call_later=lambda seconds, func:
+                                          root.after(int(seconds * 1000), func))
+        startup.mark('load ledger')
+        self.worker = BackgroundWorker(root)
+        # Only touched from the dashboard job, so it needs no locking
+        self.insights = Insights()
         self.dark_mode = False
         self.setup_ui()
+        startup.mark('build window')
         self.update_ui(full_refresh=True)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(RECURRING_CHECK_MS, self.check_recurring)
+
+    def check_recurring(self):
+        """Apply recurring bills that came due while the app is open"""
+        if self.tracker.process_recurring():
+            self.update_ui()
+        self.root.after(RECURRING_CHECK_MS, self.check_recurring)
+
+    def on_close(self):
+        """Write out pending changes and exit"""
+        self.worker.shutdown()
+        self.tracker.compact()
+        self.tracker.close()
+        for chart in (self.heatmap, self.sparkline, self.balance_chart):
+            if chart is not None:
+                chart.close()
+        if self.metrics_path:
+            metrics.dump(self.metrics_path)
+        self.root.destroy()
         
     def setup_ui(self):
         self.root.title("Finance Tracker Pro")
@@ -52,6 +97,7 @@ class FinanceTrackerApp:
         self.setup_transactions_tab()
         self.setup_budgets_tab()
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
         
         # Dark mode toggle
         ttk.Button(self.root, 
@@ -159,14 +205,33 @@ class FinanceTrackerApp:
         # Sparkline container
         self.spark_frame = ttk.Frame(container)
         self.spark_frame.pack()
-        self.spark_canvas = None
-        
+        self.sparkline = None
+        self.spark_label = ttk.Label(self.spark_frame)
+        self.spark_label.pack(side='left', padx=5)
+        self.balance_chart = None
+        self.balance_label = ttk.Label(self.spark_frame)
+        self.balance_label.pack(side='left', padx=5)
+        
+        # Insights
+        insights_frame = ttk.LabelFrame(container,
+                                      text="💡 Insights",
+                                      padding=10)
+        insights_frame.pack(fill='x', pady=(10, 0))
+        self.insights_var = tk.StringVar(value="")
+        ttk.Label(insights_frame,
+                 textvariable=self.insights_var,
+                 justify='left').pack(anchor='w')
+
         # Heatmap container
         self.heat_frame = ttk.LabelFrame(container, 
                                        text="🔥 Spending Heatmap",
                                        padding=10)
         self.heat_frame.pack(fill='x', pady=(10, 5))
-        self.heatmap_canvas = None
+        self.heatmap = None
+        self.heatmap_label = ttk.Label(self.heat_frame)
+        self.heatmap_label.pack(padx=10, pady=5)
+        self.chart_images = {}
+        self.last_budget_rows = None
         
         # Recent transactions
         self.recent_frame = ttk.LabelFrame(container, 
@@ -194,29 +259,143 @@ class FinanceTrackerApp:
         
         self.notebook.add(self.dashboard_tab, text="Dashboard")
     
-    def setup_heatmap(self, parent_frame):
-        """Initialize or update heatmap visualization"""
-        if hasattr(self, 'heatmap_canvas') and self.heatmap_canvas:
-            self.heatmap_canvas.get_tk_widget().destroy()
-            
-        fig = create_spending_heatmap(self.tracker.transactions)
-        if fig:
-            self.heatmap_canvas = FigureCanvasTkAgg(fig, master=parent_frame)
-            self.heatmap_canvas.draw()
-            self.heatmap_canvas.get_tk_widget().pack(fill='x', padx=10, pady=5)
-        else:
-            ttk.Label(parent_frame, text="No spending data available").pack()
-    
-    def setup_sparkline(self, parent_frame):
-        """Initialize or update sparkline visualization"""
-        if hasattr(self, 'spark_canvas') and self.spark_canvas:
-            self.spark_canvas.get_tk_widget().destroy()
-            
-        fig = create_spending_sparkline(self.tracker.transactions)
-        if fig:
-            self.spark_canvas = FigureCanvasTkAgg(fig, master=parent_frame)
-            self.spark_canvas.draw()
-            self.spark_canvas.get_tk_widget().pack()
+    def on_tab_changed(self, event=None):
+        """Fill the transaction list lazily, when its tab is shown"""
+        if self.notebook.select() == str(self.transactions_tab):
+            self.transaction_tree.refresh()
+
+    def compute_dashboard(self, snapshot, job):
+        """Dashboard numbers, budget rows and chart images (runs on the worker thread).
+
+        The summary is posted as soon as it is ready; the charts follow,
+        loading the charting stack on first use.
+        """
+        with metrics.phase('update_ui.aggregates'):
+            job.post(self.show_summary, self.compute_summary(snapshot))
+        if self.heatmap is None:
+            self.load_charts()
+
+        charts = {}
+        for name, chart in (('sparkline', self.sparkline), ('balance', self.balance_chart),
+                            ('heatmap', self.heatmap)):
+            if job.is_cancelled():
+                return None
+            with metrics.phase(f'update_ui.chart.{name}'):
+                chart.update(snapshot)
+                charts[name] = None if chart.empty else chart.render_png()
+        return charts
+
+    def load_charts(self):
+        start = time.perf_counter()
+        from visualization import BalanceChart, SpendingHeatmap, SpendingSparkline
+        startup.record('import charting (background)', time.perf_counter() - start)
+        self.sparkline = SpendingSparkline()
+        self.balance_chart = BalanceChart()
+        self.heatmap = SpendingHeatmap()
+
+    def compute_summary(self, snapshot):
+        monthly_spent = snapshot.get_monthly_total('expense')
+        return {
+            'available': snapshot.get_available_funds(),
+            'monthly_spent': monthly_spent,
+            'budget': next(iter(snapshot.budgets.values()), None),
+            'budget_rows': [
+                (category.title(), f"${data['limit']:.2f}",
+                 f"${data['spent']:.2f}", f"${data['remaining']:.2f}")
+                for category, data in snapshot.get_budget_status().items()
+            ],
+            'recent': [(t['date'], f"${t['amount']:.2f}", t['category'].title())
+                       for t in snapshot.recent],
+            'insights': self.describe_insights(snapshot)
+        }
+
+    def describe_insights(self, snapshot):
+        self.insights.update(snapshot)
+        insights = self.insights.result
+        lines = []
+        for rolling in insights['rolling']:
+            line = f"Last {rolling['window']} days: ${rolling['spend']:.2f}"
+            if rolling['percent'] is not None:
+                line += f" ({rolling['percent']:+.0f}% vs the {rolling['window']} days before)"
+            lines.append(line)
+        for mover in insights['movers'][:1]:
+            lines.append(f"Biggest change: {mover['category'].title()} "
+                         f"{'+' if mover['change'] > 0 else '-'}${abs(mover['change']):.2f} "
+                         f"vs last month")
+        for t in insights['anomalies'][:3]:
+            lines.append(f"Unusual: ${t['amount']:.2f} {t['category'].title()} on {t['date']} "
+                         f"(usually ${t['usual']:.2f})")
+
+        projection = forecast(snapshot, HORIZON_MONTHS)
+        if projection['days']:
+            line = f"Forecast: ${projection['balance'][-1]:.2f} by {projection['days'][-1]}"
+            if projection['first_negative']:
+                line += f", below zero from {projection['first_negative']}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def show_summary(self, result):
+        """Apply the computed summary cards, budgets and recent rows"""
+        with metrics.phase('update_ui.widgets'):
+            self.apply_summary(result)
+        startup.mark_once('summary cards')
+
+    def show_charts(self, charts):
+        """Swap in the rendered charts"""
+        if charts is None:
+            return
+        with metrics.phase('update_ui.widgets'):
+            self.show_chart('sparkline', self.spark_label, charts['sparkline'])
+            self.show_chart('balance', self.balance_label, charts['balance'])
+            self.show_chart('heatmap', self.heatmap_label, charts['heatmap'],
+                            "No spending data available")
+        if startup.mark_once('charts'):
+            if os.environ.get('FINANCE_TRACKER_STARTUP'):
+                print("Startup time:\n" + startup.report(), file=sys.stderr)
+
+    def apply_summary(self, result):
+        self.available_var.set(f"${result['available']:.2f}")
+        self.available_funds_var.set(f"${result['available']:.2f}")
+        monthly_spent = result['monthly_spent']
+        self.monthly_spend_var.set(f"${monthly_spent:.2f}")
+        self.insights_var.set(result['insights'])
+
+        # Update budget progress
+        budget = result['budget']
+        if budget is not None:
+            self.budget_progress['maximum'] = budget
+            self.budget_progress['value'] = min(monthly_spent, budget)
+            if monthly_spent > budget * 0.8:  # Change color if approaching limit
+                self.style.configure("Horizontal.TProgressbar",
+                                   background=self.colors["danger"])
+            else:
+                self.style.configure("Horizontal.TProgressbar",
+                                   background=self.colors["success"])
+
+        # Update recent transactions
+        self.recent_tree.delete(*self.recent_tree.get_children())
+        for values in result['recent']:
+            self.recent_tree.insert("", "end", values=values)
+
+        # Update budgets
+        if result['budget_rows'] != self.last_budget_rows:
+            self.budget_tree.delete(*self.budget_tree.get_children())
+            for values in result['budget_rows']:
+                self.budget_tree.insert("", "end", values=values)
+            self.last_budget_rows = result['budget_rows']
+
+    def show_chart(self, name, label, png, empty_text=""):
+        """Swap a rendered chart into its label, only if the image changed"""
+        current = self.chart_images.get(name)
+        if current is not None and current[0] is png:
+            return
+        if png is None:
+            self.chart_images.pop(name, None)
+            label.configure(image="", text=empty_text)
+            return
+        image = tk.PhotoImage(data=base64.b64encode(png))
+        self.chart_images[name] = (png, image)
+        label.configure(image=image, text="")
     
     def setup_transactions_tab(self):
         """Setup the transactions tab with entry form and list"""
@@ -271,6 +450,9 @@ class FinanceTrackerApp:
         ttk.Button(button_frame,
                   text="Add Recurring",
                   command=self.add_recurring_bill).pack(side='left', padx=5)
+        ttk.Button(button_frame,
+                  text="Import Statement",
+                  command=self.import_statement).pack(side='left', padx=5)
         
         # Transaction List
         list_frame = ttk.LabelFrame(container, 
@@ -278,24 +460,44 @@ class FinanceTrackerApp:
                                   padding=10)
         list_frame.pack(fill='both', expand=True)
         
-        self.transaction_tree = ttk.Treeview(list_frame, 
-                                           columns=("Date", "Amount", "Category", "Type"), 
-                                           show="headings")
-        for col in ["Date", "Amount", "Category", "Type"]:
-            self.transaction_tree.heading(col, text=col)
-            self.transaction_tree.column(col, width=100, anchor='center')
+        # Filters for the list, answered from the tracker's date/category index
+        filter_frame = ttk.Frame(list_frame)
+        filter_frame.pack(side='top', fill='x', pady=(0, 5))
+        self.list_filters = {}
+        self.filter_entries = {}
+        for label, key in (("Category:", 'categories'), ("From:", 'since'), ("To:", 'until')):
+            ttk.Label(filter_frame, text=label).pack(side='left', padx=(5, 2))
+            entry = ttk.Entry(filter_frame, width=12)
+            entry.pack(side='left')
+            entry.bind("<Return>", lambda e: self.apply_list_filters())
+            self.filter_entries[key] = entry
+        ttk.Button(filter_frame,
+                  text="Filter",
+                  command=self.apply_list_filters).pack(side='left', padx=5)
+        ttk.Button(filter_frame,
+                  text="Clear",
+                  command=self.clear_list_filters).pack(side='left')
+
+        self.transaction_tree = VirtualTreeview(list_frame,
+                                              columns=("Date", "Amount", "Category", "Type"),
+                                              fetch=lambda offset, limit, sort_by, reverse:
+                                                  self.tracker.query(offset=offset, limit=limit,
+                                                                     sort_by=sort_by,
+                                                                     reverse=reverse,
+                                                                     **self.list_filters),
+                                              count=lambda: self.tracker.count(**self.list_filters),
+                                              format_row=lambda t: (
+                                                  t['date'],
+                                                  f"${t['amount']:.2f}",
+                                                  t['category'].title(),
+                                                  t['type'].title()
+                                              ))
         
         self.transaction_tree.column("Date", width=150)
         self.transaction_tree.column("Amount", width=120)
         self.transaction_tree.column("Category", width=200)
         
-        scrollbar = ttk.Scrollbar(list_frame, 
-                                orient="vertical", 
-                                command=self.transaction_tree.yview)
-        self.transaction_tree.configure(yscrollcommand=scrollbar.set)
-        
         self.transaction_tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
         
         # List action buttons
         action_frame = ttk.Frame(list_frame)
@@ -304,12 +506,38 @@ class FinanceTrackerApp:
         ttk.Button(action_frame, 
                   text="Delete Selected", 
                   command=self.delete_transaction).pack(side='left', padx=5)
+        ttk.Button(action_frame, 
+                  text="Edit Selected", 
+                  command=self.edit_transaction).pack(side='left', padx=5)
         ttk.Button(action_frame, 
                   text="Refresh", 
                   command=lambda: self.update_ui(full_refresh=True)).pack(side='left', padx=5)
         
         self.notebook.add(self.transactions_tab, text="Transactions")
     
+    def apply_list_filters(self):
+        filters = {}
+        category = self.filter_entries['categories'].get().strip().lower()
+        if category:
+            filters['categories'] = [c.strip() for c in category.split(",") if c.strip()]
+        for key in ('since', 'until'):
+            value = self.filter_entries[key].get().strip()
+            if not value:
+                continue
+            try:
+                filters[key] = datetime.fromisoformat(value).strftime("%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Error", f"Invalid date: {value} (use YYYY-MM-DD)")
+                return
+        self.list_filters = filters
+        self.transaction_tree.offset = 0
+        self.transaction_tree.refresh()
+
+    def clear_list_filters(self):
+        for entry in self.filter_entries.values():
+            entry.delete(0, tk.END)
+        self.apply_list_filters()
+
     def setup_budgets_tab(self):
         """Setup the budgets tab with summary and management"""
         self.budgets_tab = ttk.Frame(self.notebook)
@@ -389,8 +617,7 @@ class FinanceTrackerApp:
                 messagebox.showerror("Error", "Budget must be positive")
                 return
                 
-            self.tracker.budgets[category.lower()] = amount_float
-            self.tracker._save_data()
+            self.tracker.set_budget(category, amount_float)
             messagebox.showinfo("Success", f"Budget set for {category}")
             self.update_ui()
         except ValueError:
@@ -402,17 +629,43 @@ class FinanceTrackerApp:
         if amount:
             category = simpledialog.askstring("Recurring Bill", "Category:")
             if category:
-                self.tracker.recurring.append({
-                    'amount': amount,
-                    'category': category,
-                    'type': 'expense',
-                    'interval': 30,
-                    'last_applied': None
-                })
-                self.tracker._save_data()
+                today = datetime.now()
+                self.tracker.add_recurring(amount, category, 'expense', interval=1,
+                                           frequency='months', day=today.day,
+                                           start=today.strftime("%Y-%m-%d"))
                 messagebox.showinfo("Success", "Recurring bill added!")
                 self.update_ui()
     
+    def import_statement(self):
+        """Import a CSV/OFX/QIF bank export"""
+        from importers import import_file
+
+        path = filedialog.askopenfilename(
+            title="Import Statement",
+            filetypes=[("Bank statements", "*.csv *.ofx *.qfx *.qif"), ("All files", "*.*")])
+        if not path:
+            return
+
+        def progress(rows, done, total):
+            percent = 100 * done // total if total else 100
+            self.root.title(f"Finance Tracker Pro - importing {rows} rows ({percent}%)")
+            self.root.update_idletasks()
+
+        try:
+            result = import_file(self.tracker, path, progress=progress)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Import failed: {str(e)}")
+            return
+        finally:
+            self.root.title("Finance Tracker Pro")
+
+        message = f"Imported {result['added']} transactions"
+        if result['rejected']:
+            first = result['errors'][0]
+            message += f"\n{result['rejected']} rows skipped (row {first['row']}: {first['error']})"
+        messagebox.showinfo("Import", message)
+        self.update_ui()
+
     def open_ai_window(self):
         """Open window for AI transaction parsing"""
         ai_win = tk.Toplevel(self.root)
@@ -423,6 +676,41 @@ class FinanceTrackerApp:
         self.ai_entry.pack(pady=5)
         
         ttk.Button(ai_win, text="Parse", command=self.parse_ai_input).pack(pady=10)
+        # Warm up the parser while the user types
+        threading.Thread(target=self.preload_nlp, daemon=True).start()
+
+        ttk.Label(ai_win, text="Or paste one transaction per line:").pack(pady=(10, 5))
+        self.ai_batch = tk.Text(ai_win, width=50, height=8)
+        self.ai_batch.pack(padx=10, pady=5)
+        ttk.Button(ai_win, text="Add All", command=self.parse_ai_batch).pack(pady=10)
+    
+    @staticmethod
+    def preload_nlp():
+        """Import the parser modules so the first parse does not pay for it"""
+        for module in ("nlp_queries", "dateparser"):
+            importlib.import_module(module)
+
+    def parse_ai_batch(self):
+        """Parse a pasted list of descriptions and add every line that parses"""
+        from nlp_queries import extract_many
+
+        lines = [line for line in self.ai_batch.get("1.0", tk.END).splitlines() if line.strip()]
+        if not lines:
+            messagebox.showwarning("Warning", "Paste at least one line")
+            return
+
+        results = extract_many(lines)
+        added, _ = self.tracker.add_transactions(
+            [r['transaction'] for r in results if r['transaction']])
+        failed = [r for r in results if r['error']]
+
+        message = f"Added {len(added)} of {len(lines)} transactions"
+        if failed:
+            message += "\n\nNot added:\n" + "\n".join(
+                f"Line {r['line']}: {r['error']}" for r in failed[:10])
+        messagebox.showinfo("Batch Import", message)
+        self.update_ui()
+        self.ai_batch.master.destroy()
     
     def parse_ai_input(self):
         """Parse natural language transaction description"""
@@ -482,105 +770,78 @@ class FinanceTrackerApp:
     
     def delete_transaction(self):
         """Delete selected transaction"""
-        selected = self.transaction_tree.selection()
-        if not selected:
+        transaction_id = self.transaction_tree.selected_id()
+        if transaction_id is None:
             messagebox.showwarning("Warning", "Select a transaction first")
             return
 
-        item = self.transaction_tree.item(selected[0])
-        values = item['values']
-        
         try:
-            date = values[0]
-            amount = float(values[1].replace("$", ""))
-            category = values[2].lower()
-            trans_type = values[3].lower()
-            
-            for t in self.tracker.transactions:
-                if (t['date'] == date and 
-                    t['amount'] == amount and 
-                    t['category'].lower() == category and 
-                    t['type'].lower() == trans_type):
-                    
-                    self.tracker.transactions.remove(t)
-                    self.tracker._save_data()
-                    messagebox.showinfo("Success", "Transaction deleted")
-                    self.update_ui()
-                    return
+            if self.tracker.delete_transaction(transaction_id):
+                messagebox.showinfo("Success", "Transaction deleted")
+                self.update_ui()
+                return
                     
             messagebox.showerror("Error", "Transaction not found")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete: {str(e)}")
     
+    def edit_transaction(self):
+        """Edit amount and category of the selected transaction"""
+        transaction_id = self.transaction_tree.selected_id()
+        if transaction_id is None:
+            messagebox.showwarning("Warning", "Select a transaction first")
+            return
+
+        row = self.tracker.get_transaction(transaction_id)
+        if row is None:
+            messagebox.showwarning("Warning", "That transaction no longer exists")
+            self.update_ui()
+            return
+        # The dialogs run the event loop, which may move rows in the store
+        row = dict(row)
+        amount = simpledialog.askfloat("Edit Transaction", "Amount:",
+                                       initialvalue=row['amount'], minvalue=0.01)
+        if amount is None:
+            return
+        category = simpledialog.askstring("Edit Transaction", "Category:",
+                                          initialvalue=row['category'].title())
+        if not category:
+            return
+
+        if self.tracker.update_transaction(transaction_id, amount=amount, category=category):
+            self.update_ui()
+        else:
+            messagebox.showerror("Error", "Failed to update transaction")
+    
     def update_ui(self, full_refresh=False):
         """Refresh all UI elements with smart updates"""
-        # Update financial summaries
-        available = self.tracker.get_available_funds()
-        self.available_var.set(f"${available:.2f}")
-        self.available_funds_var.set(f"${available:.2f}")
-
-        current_month = datetime.now().strftime("%Y-%m")
-        monthly_spent = sum(
-            t['amount'] for t in self.tracker.transactions
-            if t['type'] == 'expense' and t['date'].startswith(current_month)
-        )
-        self.monthly_spend_var.set(f"${monthly_spent:.2f}")
+        if full_refresh:
+            self.last_budget_rows = None
 
-        # Update budget progress
-        if self.tracker.budgets:
-            budget = next(iter(self.tracker.budgets.values()))
-            self.budget_progress['maximum'] = budget
-            self.budget_progress['value'] = min(monthly_spent, budget)
-            if monthly_spent > budget * 0.8:  # Change color if approaching limit
-                self.style.configure("Horizontal.TProgressbar",
-                                   background=self.colors["danger"])
-            else:
-                self.style.configure("Horizontal.TProgressbar",
-                                   background=self.colors["success"])
+        if metrics.profile_path:
+            # Profile one whole refresh, run synchronously so it is all captured
+            path, metrics.profile_path = metrics.profile_path, None
+            metrics.profile(self.refresh_now, path=path)
+            return
 
-        # Update transactions list
-        if full_refresh or not hasattr(self, 'last_transaction_count') or \
-           self.last_transaction_count != len(self.tracker.transactions):
-            
-            self.transaction_tree.delete(*self.transaction_tree.get_children())
-            for t in sorted(self.tracker.transactions, 
-                          key=lambda x: x['date'], reverse=True):
-                self.transaction_tree.insert("", "end", values=(
-                    t['date'],
-                    f"${t['amount']:.2f}",
-                    t['category'].title(),
-                    t['type'].title()
-                ))
-            self.last_transaction_count = len(self.tracker.transactions)
+        # Update transactions list (only the rows in view)
+        with metrics.phase('update_ui.transactions'):
+            if self.notebook.select() == str(self.transactions_tab):
+                self.transaction_tree.refresh()
 
-        # Update recent transactions
-        self.recent_tree.delete(*self.recent_tree.get_children())
-        for t in sorted(self.tracker.transactions, 
-                       key=lambda x: x['date'], reverse=True)[:5]:
-            self.recent_tree.insert("", "end", values=(
-                t['date'],
-                f"${t['amount']:.2f}",
-                t['category'].title()
-            ))
+        # Aggregates and charts are computed off the Tk thread from a
+        # snapshot; a newer refresh cancels one still in flight
+        with metrics.phase('update_ui.snapshot'):
+            snapshot = self.tracker.snapshot(window_days=max(self.insights.windows))
+        self.worker.submit(self.compute_dashboard, self.show_charts, snapshot)
 
-        # Update budgets
-        current_budgets = set(self.tracker.budgets.items())
-        if full_refresh or not hasattr(self, 'last_budgets') or \
-           current_budgets != self.last_budgets:
-            
-            self.budget_tree.delete(*self.budget_tree.get_children())
-            for category, data in self.tracker.get_budget_status().items():
-                self.budget_tree.insert("", "end", values=(
-                    category.title(),
-                    f"${data['limit']:.2f}",
-                    f"${data['spent']:.2f}",
-                    f"${data['remaining']:.2f}"
-                ))
-            self.last_budgets = current_budgets
-
-        # Update visualizations
-        self.setup_heatmap(self.heat_frame)
-        self.setup_sparkline(self.spark_frame)
+    def refresh_now(self):
+        """The same refresh as update_ui, entirely on the Tk thread"""
+        self.worker.drain()
+        if self.notebook.select() == str(self.transactions_tab):
+            self.transaction_tree.refresh()
+        snapshot = self.tracker.snapshot(window_days=max(self.insights.windows))
+        self.show_charts(self.compute_dashboard(snapshot, Job()))
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,254 @@
+"""Benchmarks FinanceTracker and the chart builders on synthetic ledgers.
+
+    python benchmark.py --sizes 10000 100000 --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.25
+
+Ledgers are generated from a fixed seed, so runs are comparable. Results
+are written as JSON; with ``--baseline`` the exit status is 1 when any
+operation got slower than the baseline by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+from tracker import FinanceTracker
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+EXPENSES = {
+    # category: (relative frequency, typical amount)
+    'groceries': (30, 60.0), 'dining': (20, 35.0), 'transport': (15, 20.0),
+    'utilities': (5, 120.0), 'entertainment': (8, 40.0), 'shopping': (10, 85.0),
+    'health': (4, 70.0), 'travel': (2, 450.0), 'coffee': (25, 5.0), 'gifts': (3, 60.0),
+}
+INCOME = {'salary': (1, 4200.0), 'freelance': (3, 650.0), 'interest': (1, 15.0)}
+BUDGETS = {'groceries': 600.0, 'dining': 300.0, 'entertainment': 150.0, 'shopping': 400.0}
+SENTENCES = [
+    "spent {amount} on {category} yesterday",
+    "paid {amount} for {category} on {weekday}",
+    "bought {category} for {amount} today",
+    "received {amount} salary {iso}",
+    "spent {amount} at {category} 3 days ago",
+    "paid {amount} for {category}",
+]
+
+
+def generate_rows(count: int, seed: int = 42, end: date = None):
+    """Yield ``count`` realistic transactions, oldest first, ending at ``end``"""
+    rng = random.Random(seed)
+    end = end or date.today()
+    # About 25 transactions a day, at least a year of history
+    days = max(365, count // 25)
+    start = end - timedelta(days=days)
+    categories = list(EXPENSES)
+    weights = [EXPENSES[c][0] for c in categories]
+    income_every = max(1, count // (days // 14 or 1))
+
+    for i in range(count):
+        when = start + timedelta(days=i * days // count)
+        if i % income_every == 0:
+            category = rng.choice(list(INCOME))
+            amount = INCOME[category][1] * rng.uniform(0.9, 1.1)
+            trans_type = 'income'
+        else:
+            category = rng.choices(categories, weights)[0]
+            amount = rng.lognormvariate(0, 0.6) * EXPENSES[category][1]
+            trans_type = 'expense'
+        yield {'id': i + 1, 'amount': round(amount, 2), 'category': category,
+               'type': trans_type, 'date': when.isoformat()}
+
+
+def recurring_rules(today: date) -> List[Dict]:
+    # Last applied two months back, so loading has occurrences to catch up
+    past = (today - timedelta(days=60)).isoformat()
+    return [
+        {'amount': 1500.0, 'category': 'rent', 'type': 'expense', 'interval': 1,
+         'frequency': 'months', 'day': 1, 'last_applied': past},
+        {'amount': 12.99, 'category': 'streaming', 'type': 'expense', 'interval': 30,
+         'last_applied': past},
+        {'amount': 40.0, 'category': 'gym', 'type': 'expense', 'interval': 1,
+         'frequency': 'weeks', 'weekday': 0, 'last_applied': past},
+        {'amount': 4200.0, 'category': 'salary', 'type': 'income', 'interval': 2,
+         'frequency': 'weeks', 'weekday': 4, 'last_applied': past},
+    ]
+
+
+def write_ledger(path: str, count: int, seed: int = 42):
+    """Stream a synthetic ledger to ``path`` in the tracker's JSON format"""
+    today = date.today()
+    with open(path, 'w') as f:
+        f.write('{"transactions": [')
+        for i, row in enumerate(generate_rows(count, seed, today)):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(row))
+        f.write('],\n')
+        f.write(f'"budgets": {json.dumps(BUDGETS)},\n')
+        f.write(f'"recurring": {json.dumps(recurring_rules(today))},\n')
+        f.write('"notifications": [],\n')
+        f.write(f'"next_id": {count + 1}}}')
+
+
+def sentences(count: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+    return [
+        rng.choice(SENTENCES).format(
+            amount=rng.randint(1, 300), category=rng.choice(list(EXPENSES)),
+            weekday=rng.choice(weekdays),
+            iso=(date.today() - timedelta(days=rng.randint(0, 60))).isoformat())
+        for _ in range(count)
+    ]
+
+
+def measure(func: Callable, repeat: int, setup: Callable = None) -> Dict:
+    """Time ``func`` ``repeat`` times (after ``setup``, untimed) in seconds"""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'best': min(times), 'median': statistics.median(times), 'runs': repeat}
+
+
+def per_call(func: Callable, calls: int, repeat: int) -> Dict:
+    """Like ``measure``, but reports the time of a single call out of ``calls``"""
+    def batch():
+        for _ in range(calls):
+            func()
+    result = measure(batch, repeat)
+    result['best'] /= calls
+    result['median'] /= calls
+    result['calls'] = calls
+    return result
+
+
+def bench_size(size: int, workdir: str, repeat: int, seed: int) -> Dict:
+    from nlp_queries import extract_many, extract_transaction_details
+    from visualization import (SpendingHeatmap, SpendingSparkline, create_spending_heatmap,
+                               create_spending_sparkline)
+
+    path = os.path.join(workdir, f"ledger_{size}.json")
+    write_ledger(path, size, seed)
+    results = {}
+
+    tracker = FinanceTracker(path)
+    results['_load_data'] = measure(tracker._load_data, repeat)
+    results['_save_data'] = measure(tracker._save_data, repeat)
+    results['get_budget_status'] = per_call(tracker.get_budget_status, 1000, repeat)
+    results['get_available_funds'] = per_call(tracker.get_available_funds, 1000, repeat)
+    results['balance_on'] = per_call(lambda: tracker.balance_on(date.today().isoformat()),
+                                     1000, repeat)
+    results['balance_history'] = measure(tracker.balance_history, repeat)
+
+    today = datetime.now().date()
+    rules = recurring_rules(today)
+
+    def reset_rules():
+        for rule, original in zip(tracker.recurring, rules):
+            rule['last_applied'] = original['last_applied']
+        tracker._scheduler = None
+
+    results['process_recurring'] = measure(lambda: tracker.process_recurring(today),
+                                           repeat, setup=reset_rules)
+
+    results['create_spending_heatmap'] = measure(
+        lambda: create_spending_heatmap(tracker.transactions), repeat)
+    results['create_spending_sparkline'] = measure(
+        lambda: create_spending_sparkline(tracker.transactions), repeat)
+    tracker.close()
+
+    # Single adds as the app makes them: journaled, so no full rewrite per add
+    journaled = FinanceTracker(path, journal=True)
+    results['add_transaction'] = per_call(
+        lambda: journaled.add_transaction(4.5, 'coffee', 'expense'), 100, repeat)
+
+    # Incremental chart refresh after one add, rendering included
+    for name, chart in (('SpendingHeatmap.update', SpendingHeatmap()),
+                        ('SpendingSparkline.update', SpendingSparkline())):
+        chart.update(journaled)
+        results[name] = measure(
+            lambda: (journaled.add_transaction(9.99, 'coffee', 'expense'),
+                     chart.update(journaled), chart.render_png()), repeat)
+        chart.close()
+    journaled.close()
+
+    lines = sentences(1000, seed)
+    results['extract_transaction_details'] = measure(
+        lambda: [extract_transaction_details(s) for s in lines], repeat)
+    results['extract_transaction_details']['lines'] = len(lines)
+    results['extract_many'] = measure(lambda: extract_many(lines, workers=1), repeat)
+    return results
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float, floor: float) -> List[str]:
+    """Operations slower than the baseline median by more than ``tolerance``"""
+    regressions = []
+    for size, ops in current['results'].items():
+        for op, result in ops.items():
+            old = baseline.get('results', {}).get(size, {}).get(op)
+            if not old:
+                continue
+            new, before = result['median'], old['median']
+            if new > before * (1 + tolerance) and new - before > floor:
+                regressions.append(f"{op} @ {size} rows: {before * 1000:.3f} ms -> "
+                                   f"{new * 1000:.3f} ms (+{(new / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown as a fraction (default 0.25)")
+    parser.add_argument('--floor', type=float, default=0.001,
+                        help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': {}
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"Benchmarking {size} rows...", file=sys.stderr)
+            report['results'][str(size)] = bench_size(size, workdir, args.repeat, args.seed)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.floor)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -40,7 +40,7 @@ class BudgetWindow(tk.Toplevel):
         for category, data in status.items():
             self.tree.insert("", "end", values=(
                 category, 
-                f"${data['budget']:.2f}", 
+                f"${data['limit']:.2f}", 
                 f"${data['spent']:.2f}"
             ))
     
@@ -1,13 +1,276 @@
 import json
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+from store import TransactionStore
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+_NUMBER_TAIL = "0123456789.eE+-"
+
+
+class _Reader:
+    """Buffered text reader that decodes one JSON value at a time"""
+
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size: int = 0) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop consumed text so the buffer stays around one chunk in size
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expected {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        # Each retry decodes from the start of the value again, so read
+        # geometrically more to keep one large value linear overall
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number cut off by the chunk boundary would decode short
+                if self.eof or (end < len(self.buf) and self.buf[end] not in _NUMBER_TAIL):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(size)
+            size *= 2
+
+    def array(self) -> Iterator:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            match = _SEPARATOR.match(self.buf, self.pos)
+            if match and match.end() < len(self.buf):
+                self.pos = match.end()
+                if match.group(1) == "]":
+                    return
+                continue
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise json.JSONDecodeError("Expected ',' or ']'", self.buf, self.pos - 1)
+
+
+def iter_ledger(f, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, object]]:
+    """Incrementally parse a ledger file.
+
+    Yields ``('transaction', item)`` for every entry of the transactions
+    array, one at a time, and ``(key, value)`` for the other top-level keys.
+    Both the old (bare list) and new (dict) layouts are accepted.
+    """
+    reader = _Reader(f, chunk_size)
+    first = reader.peek()
+    if first == "[":
+        for item in reader.array():
+            yield 'transaction', item
+        return
+
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == 'transactions' and reader.peek() == "[":
+            for item in reader.array():
+                yield 'transaction', item
+        elif reader.peek() == "[":
+            # Other arrays (recurring rules, notifications) are decoded an
+            # element at a time too, then handed over whole
+            yield key, list(reader.array())
+        else:
+            yield key, reader.value()
+        char = reader.peek()
+        reader.pos += 1
+        if char == "}":
+            return
+        if char != ",":
+            raise json.JSONDecodeError("Expected ',' or '}'", reader.buf, reader.pos - 1)
+
+
+def _replace_atomic(path: str, write, mode: str = "w"):
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_json_atomic(path: str, data, indent=None):
+    """Write ``data`` to a temp file beside ``path`` and rename it into place.
+
+    Readers and a crash mid-write see either the old file or the new one,
+    never a truncated mix.
+    """
+    _replace_atomic(path, lambda f: json.dump(data, f, indent=indent))
+
+
+# Binary snapshot: a fixed header, then the store's columns as packed
+# little-endian arrays (ids int64, amounts float64, date ordinals int32,
+# category codes int32, type codes int8), the category and type string
+# tables, and the remaining state (budgets, recurring rules, ...) as JSON.
+# The CRC32 covers everything after the header.
+SNAPSHOT_MAGIC = b"FTSNAP"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<6sHQIIII")
+_COLUMNS = (('ids', 'q'), ('amounts', 'd'), ('dates', 'i'), ('categories', 'i'), ('types', 'b'))
+
+
+def _little_endian(column: array) -> array:
+    if sys.byteorder == 'little':
+        return column
+    column = array(column.typecode, column)
+    column.byteswap()
+    return column
+
+
+def _pack_names(names: List[str]) -> bytes:
+    return b"".join(struct.pack("<I", len(data)) + data
+                    for data in (name.encode("utf-8") for name in names))
+
+
+def _unpack_names(body: memoryview, offset: int, count: int) -> Tuple[List[str], int]:
+    names = []
+    for _ in range(count):
+        (size,) = struct.unpack_from("<I", body, offset)
+        offset += 4
+        names.append(bytes(body[offset:offset + size]).decode("utf-8"))
+        offset += size
+    return names, offset
+
+
+def write_snapshot(path: str, store: TransactionStore, state: Dict):
+    """Atomically write ``store`` and the JSON-able ``state`` as a binary snapshot"""
+    parts = [_little_endian(getattr(store, name)).tobytes() for name, _ in _COLUMNS]
+    parts.append(_pack_names(store.category_names))
+    parts.append(_pack_names(store.type_names))
+    parts.append(json.dumps(state).encode("utf-8"))
+    checksum = 0
+    for part in parts:
+        checksum = zlib.crc32(part, checksum)
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, store.next_id, len(store),
+                          len(store.category_names), len(store.type_names), checksum)
+
+    def write(f):
+        f.write(header)
+        for part in parts:
+            f.write(part)
+
+    _replace_atomic(path, write, "wb")
+
+
+def read_snapshot(path: str) -> Tuple[TransactionStore, Dict]:
+    """The store and state saved by ``write_snapshot``, read in one go.
+
+    Raises ValueError for a file that is not a snapshot, was written by a
+    newer version or fails its checksum.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path}: not a ledger snapshot")
+    magic, version, next_id, count, n_categories, n_types, checksum = \
+        _HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path}: not a ledger snapshot")
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(f"{path}: snapshot version {version} is newer than supported")
+    body = memoryview(data)[_HEADER.size:]
+    if zlib.crc32(body) != checksum:
+        raise ValueError(f"{path}: snapshot checksum mismatch")
+
+    columns = []
+    offset = 0
+    for _, typecode in _COLUMNS:
+        column = array(typecode)
+        size = count * column.itemsize
+        column.frombytes(body[offset:offset + size])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        columns.append(column)
+        offset += size
+    category_names, offset = _unpack_names(body, offset, n_categories)
+    type_names, offset = _unpack_names(body, offset, n_types)
+    state = json.loads(bytes(body[offset:]).decode("utf-8"))
+
+    store = TransactionStore.from_arrays(*columns, category_names, type_names)
+    store.next_id = max(store.next_id, next_id)
+    return store, state
+
+
+def export_json(snapshot_path: str, json_path: str, indent=4):
+    """Write a binary snapshot out as a JSON ledger (the interchange format)"""
+    store, state = read_snapshot(snapshot_path)
+    state.pop('journal_seq', None)
+    write_json_atomic(json_path, {'transactions': store.to_dicts(), **state,
+                                  'next_id': store.next_id}, indent=indent)
+
+
+def import_json(json_path: str, snapshot_path: str):
+    """Write a JSON ledger (either layout) as a binary snapshot"""
+    store = TransactionStore()
+    state = {}
+    with open(json_path, "r") as f:
+        for key, value in iter_ledger(f):
+            if key == 'transaction':
+                store.append(value)
+            elif key in ('budgets', 'recurring', 'notifications'):
+                state[key] = value
+            elif key == 'next_id':
+                store.next_id = max(store.next_id, value)
+    write_snapshot(snapshot_path, store, state)
+
 
 def save_transactions(transactions, filename="data/transactions.json"):
-    with open(filename, "w") as f:
-        json.dump(transactions, f)
+    write_json_atomic(filename, transactions)
 
 def load_transactions(filename="data/transactions.json"):
     try:
         with open(filename, "r") as f:
-            return json.load(f)
+            return [item for kind, item in iter_ledger(f) if kind == 'transaction']
     except FileNotFoundError:
         return []
- 
@@ -0,0 +1,131 @@
+"""Daily cash-flow forecast for the months ahead.
+
+The projection starts from today's balance and adds, for every future day,
+the occurrences of the recurring rules plus a run rate for each category
+those rules do not cover, taken from the last few complete months. Rule
+calendars are expanded straight into arrays of day ordinals and all flows
+land in one ``bincount``, so long horizons with many rules stay cheap.
+"""
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from scheduler import add_months, next_due
+
+HORIZON_MONTHS = 6
+HISTORY_MONTHS = 3
+# numpy's datetime64[D] counts days from 1970-01-01
+EPOCH = date(1970, 1, 1).toordinal()
+
+
+def _month(day: date, offset: int = 0) -> str:
+    months = day.year * 12 + day.month - 1 + offset
+    return f"{months // 12:04d}-{months % 12 + 1:02d}"
+
+
+def _months_from(first: date, interval: int, day: int, end: date) -> np.ndarray:
+    """Ordinals of ``day`` (clamped to the month length) every ``interval`` months"""
+    start = np.datetime64(first.strftime("%Y-%m"), 'M')
+    count = (end.year - first.year) * 12 + end.month - first.month
+    months = start + np.arange(0, count + 1, interval)
+    firsts = months.astype('datetime64[D]')
+    lengths = ((months + 1).astype('datetime64[D]') - firsts).astype(np.int64)
+    return (firsts.astype(np.int64) + np.minimum(day, lengths) - 1) + EPOCH
+
+
+def rule_dates(rule: Dict, today: date, end: date) -> np.ndarray:
+    """Ordinals of the occurrences of ``rule`` still to come, through ``end``.
+
+    Occurrences already due but not yet applied are included.
+    """
+    first = next_due(rule, today)
+    if first is None or first > end:
+        return np.zeros(0, dtype=np.int64)
+    frequency = rule.get('frequency', 'days')
+    if frequency == 'dates':
+        dates = sorted(value for value in set(rule['dates'])
+                       if first.isoformat() <= value <= end.isoformat())
+        return np.array([date.fromisoformat(value).toordinal() for value in dates],
+                        dtype=np.int64)
+    interval = int(rule['interval'])
+    if frequency == 'months':
+        ordinals = _months_from(first, interval, rule.get('day', first.day), end)
+        # A rule added without a start is first applied on the day it was added
+        ordinals[0] = first.toordinal()
+        return ordinals[ordinals <= end.toordinal()]
+    step = interval * 7 if frequency == 'weeks' else interval
+    return np.arange(first.toordinal(), end.toordinal() + 1, step, dtype=np.int64)
+
+
+def run_rates(tracker, today: date,
+              history_months: int = HISTORY_MONTHS) -> Dict[str, Dict[str, float]]:
+    """Average daily amount per type and category over the last complete months.
+
+    Categories that recurring rules already account for are left out.
+    """
+    covered = {(rule['type'], rule['category'].lower()) for rule in tracker.recurring}
+    first = date.fromisoformat(_month(today, -history_months) + "-01")
+    days = (date.fromisoformat(_month(today) + "-01") - first).days
+    rates: Dict[str, Dict[str, float]] = {}
+    for trans_type in ('income', 'expense'):
+        totals: Dict[str, float] = {}
+        for offset in range(-history_months, 0):
+            month = tracker.get_month_totals(_month(today, offset), trans_type)
+            for category, total in month.items():
+                totals[category] = totals.get(category, 0.0) + total
+        rates[trans_type] = {category: total / days for category, total in totals.items()
+                             if (trans_type, category) not in covered and total}
+    return rates
+
+
+def forecast(tracker, months: int = HORIZON_MONTHS, today: Optional[date] = None,
+             history_months: int = HISTORY_MONTHS) -> Dict:
+    """Projected end-of-day balance for every day from tomorrow through ``months`` ahead.
+
+    ``tracker`` is a FinanceTracker or a snapshot of one. The result holds
+    the 'days', the 'balance' and 'recurring' flows per day as arrays, the
+    constant daily 'run_rate' and the per-category 'rates' behind it, the
+    'first_negative' day (or None) and the 'lowest' point.
+    """
+    today = today or date.today()
+    start = today.toordinal() + 1
+    end = add_months(today, months, today.day)
+    length = end.toordinal() - start + 1
+
+    ordinals: List[np.ndarray] = []
+    amounts: List[np.ndarray] = []
+    for rule in tracker.recurring:
+        when = rule_dates(rule, today, end)
+        if not len(when):
+            continue
+        sign = 1.0 if rule['type'] == 'income' else -1.0
+        ordinals.append(when)
+        amounts.append(np.full(len(when), sign * float(rule['amount'])))
+    if ordinals:
+        # Anything overdue lands on the first projected day
+        index = np.maximum(np.concatenate(ordinals) - start, 0)
+        recurring = np.bincount(index, weights=np.concatenate(amounts), minlength=length)
+    else:
+        recurring = np.zeros(length)
+
+    rates = run_rates(tracker, today, history_months)
+    run_rate = sum(rates['income'].values()) - sum(rates['expense'].values())
+    opening = tracker.balance_on(today.isoformat())
+    balance = opening + np.cumsum(recurring + run_rate)
+
+    negative = np.flatnonzero(balance < 0)
+    lowest = int(np.argmin(balance)) if length else None
+    days = [date.fromordinal(ordinal).isoformat() for ordinal in range(start, start + length)]
+    return {
+        'today': today.isoformat(),
+        'opening': opening,
+        'days': days,
+        'balance': balance,
+        'recurring': recurring,
+        'run_rate': run_rate,
+        'rates': rates,
+        'first_negative': days[negative[0]] if len(negative) else None,
+        'lowest': {'date': days[lowest], 'balance': float(balance[lowest])}
+                  if lowest is not None else None,
+    }
@@ -0,0 +1,261 @@
+import csv
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y", "%m/%d/%y", "%d.%m.%Y", "%Y%m%d", "%d %b %Y"]
+
+TYPE_ALIASES = {
+    'expense': 'expense', 'debit': 'expense', 'dr': 'expense', 'withdrawal': 'expense',
+    'payment': 'expense', 'pos': 'expense', 'atm': 'expense', 'check': 'expense',
+    'fee': 'expense', 'srvchg': 'expense', 'directdebit': 'expense',
+    'income': 'income', 'credit': 'income', 'cr': 'income', 'deposit': 'income',
+    'dep': 'income', 'int': 'income', 'div': 'income', 'directdep': 'income',
+}
+
+# Header names tried, in order, when no explicit column mapping is given
+CSV_COLUMNS = {
+    'date': ['date', 'transaction date', 'posting date', 'posted date', 'booking date'],
+    'amount': ['amount', 'transaction amount', 'value'],
+    'category': ['category', 'description', 'payee', 'name', 'memo', 'details'],
+    'type': ['type', 'transaction type', 'dr/cr'],
+    'debit': ['debit', 'withdrawal', 'money out'],
+    'credit': ['credit', 'deposit', 'money in'],
+}
+
+
+@lru_cache(maxsize=4096)
+def parse_date(value: str, date_format: Optional[str] = None) -> Optional[str]:
+    """Normalize a statement date to YYYY-MM-DD (cached, statements repeat dates)"""
+    value = value.strip()
+    formats = [date_format] if date_format else DATE_FORMATS
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(value) -> Optional[float]:
+    if value is None:
+        return None
+    text = str(value).strip().replace(",", "").replace("$", "")
+    if not text:
+        return None
+    # Accounting style negatives: (12.50)
+    if text.startswith("(") and text.endswith(")"):
+        text = "-" + text[1:-1]
+    return float(text)
+
+
+def normalize(amount, category: str, trans_type: Optional[str], date: Optional[str],
+              date_format: Optional[str] = None) -> Dict:
+    """Turn a raw statement entry into a row for FinanceTracker.add_transactions.
+
+    Without an explicit type the sign decides: negative amounts are expenses.
+    Anything unparseable is passed through as-is so the tracker can reject
+    the row with a reason. A missing or unparseable ``date`` can't be left
+    to the tracker, which would stamp the row with today's date; the row
+    gets an 'error' instead and ``import_file`` rejects it.
+    """
+    try:
+        value = parse_amount(amount)
+    except ValueError:
+        value = amount
+    if isinstance(value, float):
+        if trans_type:
+            trans_type = TYPE_ALIASES.get(trans_type.strip().lower().replace(" ", ""), trans_type)
+        else:
+            trans_type = 'expense' if value < 0 else 'income'
+        value = abs(value)
+
+    category = re.sub(r"\s+", " ", category or "").strip() or "uncategorized"
+    row = {'amount': value, 'category': category, 'type': trans_type,
+           'date': parse_date(date, date_format) if date and date.strip() else None}
+    if row['date'] is None:
+        row['error'] = f"unparseable date {date.strip()!r}" if date and date.strip() \
+            else "missing date"
+    return row
+
+
+class _Progress:
+    """Tracks bytes consumed from the underlying binary buffer of a text file"""
+
+    def __init__(self, f):
+        self.f = f
+        self.total = os.fstat(f.fileno()).st_size
+
+    @property
+    def done(self) -> int:
+        return self.f.buffer.tell()
+
+
+def read_csv(f, columns: Optional[Dict[str, str]] = None,
+             date_format: Optional[str] = None) -> Iterator[Dict]:
+    """Yield normalized rows from a CSV export.
+
+    ``columns`` maps tracker fields (date, amount, category, type, debit,
+    credit) to header names; unmapped fields are guessed from CSV_COLUMNS.
+    """
+    reader = csv.DictReader(f)
+    headers = {h.strip().lower(): h for h in (reader.fieldnames or [])}
+    mapping = {}
+    for field, candidates in CSV_COLUMNS.items():
+        if columns and field in columns:
+            mapping[field] = columns[field]
+            continue
+        for name in candidates:
+            if name in headers:
+                mapping[field] = headers[name]
+                break
+
+    for record in reader:
+        amount = record.get(mapping['amount']) if 'amount' in mapping else None
+        if not amount and ('debit' in mapping or 'credit' in mapping):
+            debit = record.get(mapping.get('debit'), "")
+            credit = record.get(mapping.get('credit'), "")
+            amount = f"-{debit.strip().lstrip('-')}" if debit and debit.strip() else credit
+        yield normalize(
+            amount,
+            record.get(mapping.get('category'), ""),
+            record.get(mapping.get('type')) or None,
+            record.get(mapping.get('date')),
+            date_format
+        )
+
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+OFX_CHUNK = 1 << 16
+
+
+def _ofx_row(entry: Dict, date_format: Optional[str]) -> Dict:
+    return normalize(
+        entry.get('TRNAMT'),
+        entry.get('NAME') or entry.get('MEMO') or entry.get('PAYEE', ""),
+        None,
+        entry.get('DTPOSTED', "")[:8],
+        date_format or "%Y%m%d"
+    )
+
+
+def read_ofx(f, date_format: Optional[str] = None) -> Iterator[Dict]:
+    """Yield normalized rows from an OFX/QFX file (SGML or XML flavour).
+
+    The file is read in bounded chunks and tags are followed regardless of
+    line breaks, so single-line exports work. SGML files may leave
+    </STMTTRN> out; the next <STMTTRN> or the end of the list closes it.
+    """
+    entry = None
+    pending = ""
+    while True:
+        chunk = f.read(OFX_CHUNK)
+        text = pending + chunk
+        # A tag or value may run past the chunk; keep it for the next round
+        cut = text.rfind("<") if chunk else len(text)
+        if cut <= 0 and chunk:
+            pending = text
+            continue
+        pending = text[cut:]
+        for closing, tag, value in _OFX_TAG.findall(text, 0, cut):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if entry is not None:
+                    yield _ofx_row(entry, date_format)
+                entry = None if closing else {}
+            elif closing and tag == 'BANKTRANLIST' and entry is not None:
+                yield _ofx_row(entry, date_format)
+                entry = None
+            elif entry is not None and not closing and value.strip():
+                entry.setdefault(tag, value.strip())
+        if not chunk:
+            break
+    if entry is not None:
+        yield _ofx_row(entry, date_format)
+
+
+def read_qif(f, date_format: Optional[str] = None) -> Iterator[Dict]:
+    """Yield normalized rows from a QIF file"""
+    entry = {}
+    for line in f:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("!"):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == '^':
+            if entry:
+                yield normalize(
+                    entry.get('T') or entry.get('U'),
+                    entry.get('L') or entry.get('P', ""),
+                    None,
+                    entry.get('D', "").replace("'", "/"),
+                    date_format
+                )
+            entry = {}
+        else:
+            entry.setdefault(code, value)
+
+
+READERS = {
+    '.csv': read_csv,
+    '.ofx': read_ofx,
+    '.qfx': read_ofx,
+    '.qif': read_qif,
+}
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[List]:
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_file(tracker, path: str, fmt: Optional[str] = None, chunk_size: int = 5000,
+                progress: Optional[Callable[[int, int, int], None]] = None,
+                max_errors: int = 100, **options) -> Dict:
+    """Stream a bank statement into ``tracker`` in batches.
+
+    Only one batch is held in memory at a time. ``progress`` is called after
+    each batch with (rows processed, bytes read, total bytes). Returns counts
+    plus up to ``max_errors`` rejected rows with their input row number.
+    """
+    ext = (fmt or os.path.splitext(path)[1]).lower()
+    if not ext.startswith("."):
+        ext = "." + ext
+    if ext not in READERS:
+        raise ValueError(f"Unsupported statement format: {ext}")
+
+    result = {'added': 0, 'rejected': 0, 'errors': []}
+    with open(path, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+        meter = _Progress(f)
+        offset = 0
+        for batch in chunked(READERS[ext](f, **options), chunk_size):
+            valid = []
+            positions = []
+            rejected = []
+            for index, row in enumerate(batch):
+                if 'error' in row:
+                    rejected.append({'index': index, 'row': row, 'error': row.pop('error')})
+                else:
+                    positions.append(index)
+                    valid.append(row)
+            added, invalid = tracker.add_transactions(valid)
+            for entry in invalid:
+                entry['index'] = positions[entry['index']]
+            rejected = sorted(rejected + invalid, key=lambda entry: entry['index'])
+            result['added'] += len(added)
+            result['rejected'] += len(rejected)
+            for entry in rejected[:max_errors - len(result['errors'])]:
+                result['errors'].append({'row': offset + entry['index'] + 1,
+                                         'data': entry['row'],
+                                         'error': entry['error']})
+            offset += len(batch)
+            if progress:
+                progress(offset, meter.done, meter.total)
+    return result
@@ -1 +1,188 @@
- 
+"""Spending insights: rolling spend, month-over-month changes and unusual transactions.
+
+``Insights`` works from the tracker's aggregate indexes (per-day and
+per-month totals, per-category amount statistics) instead of the rows, so
+keeping it current costs the same on any ledger size. Like the charts it
+only re-reads the days that changed since it last looked. ``iqr_outliers``
+is the one whole-ledger pass, vectorized over the store's columns.
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from store import date_to_ordinal, ordinal_to_date
+
+WINDOWS = (7, 30)
+Z_THRESHOLD = 3.0
+# Fewer transactions than this in a category say too little about "usual"
+MIN_COUNT = 5
+
+
+def month_deltas(current: Dict[str, float], previous: Dict[str, float]) -> Dict[str, Dict]:
+    """Per-category change between two {category: total} months"""
+    deltas = {}
+    for category in current.keys() | previous.keys():
+        now = current.get(category, 0.0)
+        before = previous.get(category, 0.0)
+        deltas[category] = {'current': now, 'previous': before, 'change': now - before,
+                            'percent': (now - before) / before * 100 if before else None}
+    return deltas
+
+
+def top_movers(deltas: Dict[str, Dict], count: int = 3) -> List[Dict]:
+    """Categories with the largest absolute change, largest first"""
+    movers = sorted(deltas.items(), key=lambda item: -abs(item[1]['change']))[:count]
+    return [{'category': category, **delta} for category, delta in movers if delta['change']]
+
+
+def zscore_outliers(rows: Iterable[Dict], stats: Dict[str, Dict],
+                    threshold: float = Z_THRESHOLD, min_count: int = MIN_COUNT) -> List[Dict]:
+    """Rows at least ``threshold`` standard deviations above their category's mean"""
+    flagged = []
+    for row in rows:
+        stat = stats.get(row['category'])
+        if not stat or stat['count'] < min_count or stat['std'] <= 0:
+            continue
+        z = (row['amount'] - stat['mean']) / stat['std']
+        if z >= threshold:
+            flagged.append({**row, 'zscore': z, 'usual': stat['mean']})
+    flagged.sort(key=lambda row: -row['zscore'])
+    return flagged
+
+
+def iqr_outliers(store, trans_type: str = "expense", factor: float = 1.5,
+                 min_count: int = MIN_COUNT) -> List[int]:
+    """Positions of rows outside their category's [Q1 - f*IQR, Q3 + f*IQR], in date order"""
+    code = store.type_code(trans_type)
+    if code is None or not len(store):
+        return []
+    positions = np.flatnonzero(np.frombuffer(store.types, dtype=np.int8) == code)
+    amounts = np.frombuffer(store.amounts, dtype=np.float64)[positions]
+    categories = np.frombuffer(store.categories, dtype=np.intc)[positions]
+
+    # Sort by category, then amount, so each category is one sorted run
+    order = np.lexsort((amounts, categories))
+    amounts = amounts[order]
+    _, starts, counts = np.unique(categories[order], return_index=True, return_counts=True)
+
+    def quantile(q: float) -> np.ndarray:
+        # Linear interpolation, as numpy.percentile does, for every run at once
+        at = starts + q * (counts - 1)
+        low = np.floor(at).astype(np.int64)
+        high = np.ceil(at).astype(np.int64)
+        return amounts[low] + (amounts[high] - amounts[low]) * (at - low)
+
+    q1, q3 = quantile(0.25), quantile(0.75)
+    spread = (q3 - q1) * factor
+    group = np.repeat(np.arange(len(counts)), counts)
+    outside = (amounts < (q1 - spread)[group]) | (amounts > (q3 + spread)[group])
+    outside &= np.repeat(counts >= min_count, counts)
+    flagged = positions[order[outside]]
+    dates = np.frombuffer(store.dates, dtype=np.intc)[flagged]
+    return flagged[np.lexsort((np.frombuffer(store.ids, dtype=np.int64)[flagged], dates))].tolist()
+
+
+class Insights:
+    """Cached insights, brought up to date from a tracker or snapshot.
+
+    Daily expenses are kept as a calendar array, one slot per day, patched
+    in place for the days ``tracker.changed_days`` reports; rolling sums are
+    then a cumulative sum over that array.
+    """
+
+    def __init__(self, windows: Iterable[int] = WINDOWS, threshold: float = Z_THRESHOLD):
+        self.windows = tuple(windows)
+        self.threshold = threshold
+        self.version = None
+        self.start: Optional[int] = None
+        self.spend = np.zeros(0)
+        self.result: Dict = {}
+
+    def _set_days(self, daily: Dict[str, float]):
+        if not daily:
+            self.start = None
+            self.spend = np.zeros(0)
+            return
+        ordinals = np.fromiter(map(date_to_ordinal, daily), dtype=np.int64, count=len(daily))
+        self.start = int(ordinals.min())
+        self.spend = np.zeros(int(ordinals.max()) - self.start + 1)
+        self.spend[ordinals - self.start] = np.fromiter(daily.values(), dtype=np.float64,
+                                                        count=len(daily))
+
+    def _cover(self, first: int, last: int):
+        """Grow the calendar array to span ``first``..``last``"""
+        if self.start is None:
+            self.start = first
+        before = max(0, self.start - first)
+        after = max(0, last - (self.start + len(self.spend) - 1))
+        if before or after:
+            self.spend = np.pad(self.spend, (before, after))
+            self.start -= before
+
+    def _patch(self, daily: Dict[str, float]):
+        ordinals = [date_to_ordinal(day) for day in daily]
+        self._cover(min(ordinals), max(ordinals))
+        for ordinal, total in zip(ordinals, daily.values()):
+            self.spend[ordinal - self.start] = total
+
+    def _window(self, first: int, last: int) -> float:
+        """Spend from day ordinal ``first`` to ``last``, inclusive"""
+        if self.start is None:
+            return 0.0
+        lo = max(first - self.start, 0)
+        hi = min(last - self.start + 1, len(self.spend))
+        return float(self.spend[lo:hi].sum()) if hi > lo else 0.0
+
+    def rolling_series(self, window: int = 30) -> Dict[str, float]:
+        """Trailing ``window``-day spend for every day, oldest first"""
+        if self.start is None:
+            return {}
+        sums = np.concatenate(([0.0], np.cumsum(self.spend)))
+        totals = sums[window:] - sums[:-window] if len(self.spend) >= window else np.zeros(0)
+        # Days before a full window is available sum what there is
+        head = sums[1:min(window, len(self.spend) + 1)]
+        totals = np.concatenate((head, totals))
+        return dict(zip(map(ordinal_to_date, range(self.start, self.start + len(totals))),
+                        totals.tolist()))
+
+    def update(self, tracker, today: Optional[date] = None) -> bool:
+        """Sync with ``tracker``; returns False when nothing changed"""
+        today = today or date.today()
+        if tracker.version == self.version and self.result.get('today') == today.isoformat():
+            return False
+        changed = tracker.changed_days(self.version) if self.version is not None else None
+        if changed is None:
+            self._set_days(tracker.get_daily_totals('expense'))
+        elif changed:
+            self._patch(tracker.get_daily_totals('expense', changed))
+        self.version = tracker.version
+
+        end = today.toordinal()
+        rolling = []
+        for window in self.windows:
+            spend = self._window(end - window + 1, end)
+            previous = self._window(end - 2 * window + 1, end - window)
+            rolling.append({'window': window, 'spend': spend, 'previous': previous,
+                            'percent': (spend - previous) / previous * 100 if previous else None})
+
+        month = today.strftime("%Y-%m")
+        months = today.year * 12 + today.month - 2
+        last_month = f"{months // 12:04d}-{months % 12 + 1:02d}"
+        deltas = month_deltas(tracker.get_month_totals(month, 'expense'),
+                              tracker.get_month_totals(last_month, 'expense'))
+
+        rows = getattr(tracker, 'window', None)
+        if rows is None:
+            since = ordinal_to_date(end - max(self.windows) + 1)
+            rows = tracker.query(since=since, trans_type='expense')
+
+        self.result = {
+            'today': today.isoformat(),
+            'rolling': rolling,
+            'deltas': deltas,
+            'movers': top_movers(deltas),
+            'anomalies': zscore_outliers(rows, tracker.get_amount_stats('expense'),
+                                         self.threshold)
+        }
+        return True
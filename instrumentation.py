@@ -0,0 +1,259 @@
+"""Opt-in timing instrumentation.
+
+Nothing is measured until ``install()`` is called, which wraps the
+tracker and storage methods in place; without it the app runs the
+unwrapped code. The app installs it when FINANCE_TRACKER_METRICS names a
+metrics file (.json or .csv) that is written on exit. FINANCE_TRACKER_SLOW_MS
+sets the slow-operation threshold, and FINANCE_TRACKER_PROFILE names a
+file to receive a cProfile capture of one dashboard refresh. The startup
+phase report is always collected; FINANCE_TRACKER_STARTUP=1 prints it.
+"""
+import cProfile
+import csv
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACKER_METHODS = [
+    '_load_data', '_load_history', '_save_data', '_persist', 'compact',
+    'add_transaction', 'add_transactions', 'delete_transaction', 'update_transaction',
+    'set_budget', 'add_recurring', 'process_recurring', 'get_available_funds',
+    'get_budget_status', 'query', 'aggregate', 'recent_transactions', 'snapshot',
+]
+STORAGE_METHODS = ['load', 'load_before', 'save', 'log', 'log_many', 'compact']
+
+
+class Metrics:
+    """Call counts, wall time and bytes of file I/O per operation, plus a slow-operation log"""
+
+    def __init__(self, slow_threshold: float = 0.1, slow_log_size: int = 200):
+        self.enabled = False
+        self.slow_threshold = slow_threshold
+        # Per-operation overrides of slow_threshold, in seconds
+        self.thresholds: Dict[str, float] = {}
+        self.stats: Dict[str, Dict] = {}
+        self.slow = deque(maxlen=slow_log_size)
+        self.profile_path: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed: float, nbytes: int = 0):
+        with self._lock:
+            entry = self.stats.get(name)
+            if entry is None:
+                entry = self.stats[name] = {'calls': 0, 'total': 0.0, 'max': 0.0, 'bytes': 0}
+            entry['calls'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['bytes'] += nbytes
+            if elapsed >= self.thresholds.get(name, self.slow_threshold):
+                self.slow.append({'operation': name, 'seconds': elapsed, 'bytes': nbytes,
+                                  'at': time.strftime("%Y-%m-%d %H:%M:%S")})
+                logger.warning("slow operation %s took %.1f ms", name, elapsed * 1000)
+
+    @contextmanager
+    def _timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def phase(self, name: str):
+        """Context manager timing one phase; free when instrumentation is off"""
+        return self._timer(name) if self.enabled else nullcontext()
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.slow.clear()
+
+    def rows(self):
+        with self._lock:
+            return [
+                {'operation': name, 'calls': entry['calls'], 'total_s': entry['total'],
+                 'mean_ms': entry['total'] / entry['calls'] * 1000 if entry['calls'] else 0.0,
+                 'max_ms': entry['max'] * 1000, 'bytes': entry['bytes']}
+                for name, entry in sorted(self.stats.items(), key=lambda kv: -kv[1]['total'])
+            ]
+
+    def dump(self, path: str):
+        """Write the metrics to ``path``; .csv gets one row per operation, anything else JSON"""
+        rows = self.rows()
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['operation', 'calls', 'total_s',
+                                                       'mean_ms', 'max_ms', 'bytes'])
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            with open(path, 'w') as f:
+                json.dump({'operations': rows, 'slow': list(self.slow),
+                           'startup': startup.as_dict()}, f, indent=4)
+
+    def profile(self, func, *args, path: Optional[str] = None, **kwargs):
+        """Run ``func`` under cProfile, saving raw stats to ``path`` (plus a .txt summary)"""
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, *args, **kwargs)
+        finally:
+            path = path or self.profile_path
+            if path:
+                profiler.dump_stats(path)
+                summary = io.StringIO()
+                pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+                with open(path + ".txt", 'w') as f:
+                    f.write(summary.getvalue())
+
+
+class StartupTimer:
+    """Durations of the startup phases, each measured from the previous mark"""
+
+    def __init__(self):
+        self.origin: Optional[float] = None
+        self.last: Optional[float] = None
+        self.phases = []
+
+    def start(self, when: Optional[float] = None):
+        self.origin = self.last = when if when is not None else time.perf_counter()
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        if self.origin is None:
+            self.start(now)
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def mark_once(self, phase: str) -> bool:
+        """Mark ``phase`` unless it already was; True the first time"""
+        if any(name == phase for name, _ in self.phases):
+            return False
+        self.mark(phase)
+        return True
+
+    def record(self, phase: str, seconds: float):
+        """A phase timed separately, e.g. an import on a background thread"""
+        self.phases.append((phase, seconds))
+
+    def as_dict(self) -> Dict:
+        total = (self.last - self.origin) if self.origin is not None else 0.0
+        return {'phases': [{'phase': name, 'ms': seconds * 1000} for name, seconds in self.phases],
+                'total_ms': total * 1000}
+
+    def report(self) -> str:
+        lines = [f"{name:<28}{seconds * 1000:>10.1f} ms" for name, seconds in self.phases]
+        lines.append(f"{'total':<28}{self.as_dict()['total_ms']:>10.1f} ms")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+startup = StartupTimer()
+
+
+def _file_size(path: Optional[str]) -> int:
+    try:
+        return os.path.getsize(path) if path else 0
+    except OSError:
+        return 0
+
+
+def _storage_bytes(storage) -> int:
+    # Backends that rewrite many files (month shards) count what they write
+    written = getattr(storage, 'bytes_written', None)
+    if written is not None:
+        return written
+    return sum(_file_size(getattr(storage, attr, None)) for attr in ('filename', 'journal_file'))
+
+
+# Storage methods that append record how much the files grew; the others
+# read or rewrite whole files and record the file size afterwards. With a
+# bytes_written counter every method records what it wrote
+GROWING = {'log', 'log_many'}
+
+
+def _wrap(cls, method: str, prefix: str, sizes=None):
+    original = getattr(cls, method, None)
+    if original is None or getattr(original, '_instrumented', False):
+        return
+    name = f"{prefix}.{method}"
+    growing = method in GROWING
+
+    def finish(self, before: int, start: float):
+        elapsed = time.perf_counter() - start
+        nbytes = max(0, sizes(self) - before) if sizes else 0
+        metrics.record(name, elapsed, nbytes)
+
+    def iterate(self, records, before: int, start: float):
+        try:
+            yield from records
+        finally:
+            finish(self, before, start)
+
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        counted = growing or getattr(self, 'bytes_written', None) is not None
+        before = sizes(self) if sizes and counted else 0
+        start = time.perf_counter()
+        try:
+            result = original(self, *args, **kwargs)
+        except BaseException:
+            finish(self, before, start)
+            raise
+        if inspect.isgenerator(result):
+            # Streaming loaders do their work while being iterated
+            return iterate(self, result, before, start)
+        finish(self, before, start)
+        return result
+
+    wrapper._instrumented = True
+    wrapper._original = original
+    setattr(cls, method, wrapper)
+
+
+def install(slow_ms: Optional[float] = None, profile_path: Optional[str] = None,
+            tracker_methods: Iterable[str] = TRACKER_METHODS):
+    """Start recording: wraps FinanceTracker and the storage backends"""
+    from storage import BinaryStorage, JSONStorage, ShardedStorage, SQLiteStorage
+    from tracker import FinanceTracker
+
+    if slow_ms is not None:
+        metrics.slow_threshold = slow_ms / 1000
+    metrics.profile_path = profile_path
+    for method in tracker_methods:
+        _wrap(FinanceTracker, method, 'tracker')
+    for cls in (JSONStorage, BinaryStorage, SQLiteStorage, ShardedStorage):
+        for method in STORAGE_METHODS + ['_write_snapshot']:
+            _wrap(cls, method, f"storage.{cls.__name__}", sizes=_storage_bytes)
+    metrics.enabled = True
+
+
+def uninstall():
+    from storage import BinaryStorage, JSONStorage, ShardedStorage, SQLiteStorage
+    from tracker import FinanceTracker
+
+    for cls in (FinanceTracker, JSONStorage, BinaryStorage, SQLiteStorage, ShardedStorage):
+        for name, value in list(vars(cls).items()):
+            if getattr(value, '_instrumented', False):
+                setattr(cls, name, value._original)
+    metrics.enabled = False
+
+
+def install_from_env() -> Optional[str]:
+    """Install if FINANCE_TRACKER_METRICS is set; returns the metrics file path"""
+    path = os.environ.get('FINANCE_TRACKER_METRICS')
+    profile_path = os.environ.get('FINANCE_TRACKER_PROFILE')
+    if not path and not profile_path:
+        return None
+    slow_ms = os.environ.get('FINANCE_TRACKER_SLOW_MS')
+    install(float(slow_ms) if slow_ms else None, profile_path)
+    return path
@@ -1,8 +1,273 @@
+"""Command-line interface to the finance tracker; never loads Tk or matplotlib.
+
+    python main.py balance
+    python main.py balance --on 2024-03-31
+    python main.py add 12.50 groceries --date 2024-05-01
+    python main.py import statement.csv
+    python main.py budget --format json
+    python main.py monthly --format csv
+    python main.py export --since 2024-01-01 > ledger.csv
+    python main.py anomalies --method iqr
+    python main.py forecast --months 24
+"""
+import argparse
+import csv
+import json
+import sys
+from typing import Dict, Iterable, List
+
 from tracker import FinanceTracker
 
-def main():
-    tracker = FinanceTracker()
-    tracker.run()
+FORMATS = ('text', 'csv', 'json')
+
+
+class Output:
+    """Streams rows to ``out`` as aligned text, CSV or a JSON array"""
+
+    def __init__(self, fields: List[str], fmt: str = 'text', out=sys.stdout):
+        self.fields = fields
+        self.fmt = fmt
+        self.out = out
+        self.count = 0
+        self.widths = [max(len(field), 12) for field in fields]
+        if fmt == 'csv':
+            self.writer = csv.writer(out)
+            self.writer.writerow(fields)
+        elif fmt == 'json':
+            out.write("[")
+        else:
+            out.write("  ".join(f.upper().ljust(w) for f, w in zip(fields, self.widths)).rstrip()
+                      + "\n")
+
+    @staticmethod
+    def _text(value) -> str:
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    def row(self, row: Dict):
+        if self.fmt == 'csv':
+            self.writer.writerow([row[f] for f in self.fields])
+        elif self.fmt == 'json':
+            self.out.write(("," if self.count else "") + "\n  "
+                           + json.dumps({f: row[f] for f in self.fields}))
+        else:
+            cells = []
+            for field, width in zip(self.fields, self.widths):
+                value = row[field]
+                text = self._text(value)
+                cells.append(text.rjust(width) if isinstance(value, (int, float)) else text.ljust(width))
+            self.out.write("  ".join(cells).rstrip() + "\n")
+        self.count += 1
+
+    def rows(self, rows: Iterable[Dict]):
+        for row in rows:
+            self.row(row)
+        self.close()
+
+    def close(self):
+        if self.fmt == 'json':
+            self.out.write("\n]\n" if self.count else "]\n")
+
+
+def open_tracker(args, full: bool = False) -> FinanceTracker:
+    # Reports only need the aggregate index, so skip materializing old rows.
+    # Without a journal every change rewrites the file; defer those to close()
+    return FinanceTracker(args.file, journal=args.journal, sharded=args.sharded,
+                          recent_months=None if full else 1, save_delay=0)
+
+
+def cmd_add(args):
+    tracker = open_tracker(args)
+    t = tracker.add_transaction(args.amount, args.category, args.type, args.date)
+    tracker.close()
+    if t is None:
+        print("error: invalid transaction (check the category and --date YYYY-MM-DD)",
+              file=sys.stderr)
+        return 1
+    Output(['id', 'date', 'type', 'category', 'amount'], args.format).rows([t])
+    return 0
+
+
+def cmd_import(args):
+    from importers import import_file
+
+    tracker = open_tracker(args)
+
+    def progress(rows, done, total):
+        if args.progress:
+            print(f"\r{rows} rows ({done * 100 // max(total, 1)}%)", end="", file=sys.stderr)
+
+    try:
+        result = import_file(tracker, args.path, fmt=args.kind, chunk_size=args.chunk_size,
+                             progress=progress)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        tracker.close()
+    if args.progress:
+        print(file=sys.stderr)
+
+    print(f"added {result['added']}, rejected {result['rejected']}", file=sys.stderr)
+    Output(['row', 'error'], args.format).rows(result['errors'])
+    return 0 if not result['rejected'] else 2
+
+
+def cmd_balance(args):
+    tracker = open_tracker(args)
+    if args.on:
+        row = {'date': args.on, 'balance': tracker.balance_on(args.on)}
+    else:
+        row = tracker.get_balance()
+    tracker.close()
+    Output(list(row), args.format).rows([row])
+    return 0
+
+
+def cmd_budget(args):
+    tracker = open_tracker(args)
+    status = tracker.get_budget_status()
+    tracker.close()
+    Output(['category', 'limit', 'spent', 'remaining'], args.format).rows(
+        {'category': category, **data} for category, data in sorted(status.items()))
+    return 0
+
+
+def cmd_monthly(args):
+    tracker = open_tracker(args)
+    summary = tracker.monthly_summary()
+    tracker.close()
+    if args.months:
+        summary = summary[-args.months:]
+    Output(['month', 'income', 'expense', 'net'], args.format).rows(summary)
+    return 0
+
+
+def cmd_export(args):
+    # History before the recent window is only loaded when --since reaches it
+    tracker = open_tracker(args)
+    categories = [c.lower() for c in args.category] if args.category else None
+    out = Output(['id', 'date', 'type', 'category', 'amount'], args.format)
+    out.rows(tracker.query(since=args.since, until=args.until, categories=categories,
+                           trans_type=args.type))
+    tracker.close()
+    return 0
+
+
+def cmd_anomalies(args):
+    from insights import iqr_outliers, zscore_outliers
+
+    if args.method == 'iqr':
+        tracker = open_tracker(args, full=True)
+        store = tracker.transactions
+        rows = [store[i] for i in iqr_outliers(store, factor=args.factor)]
+        rows = [row for row in rows if not args.since or row['date'] >= args.since]
+    else:
+        tracker = open_tracker(args)
+        rows = zscore_outliers(tracker.query(since=args.since, trans_type='expense'),
+                               tracker.get_amount_stats('expense'), args.threshold)
+        rows.sort(key=lambda row: (row['date'], row['id']))
+    Output(['id', 'date', 'category', 'amount'], args.format).rows(rows)
+    tracker.close()
+    return 0
+
+
+def cmd_forecast(args):
+    from forecast import forecast
+
+    tracker = open_tracker(args)
+    projection = forecast(tracker, args.months)
+    tracker.close()
+
+    days = projection['days']
+    balances = projection['balance'].tolist()
+    if args.daily:
+        picked = range(len(days))
+    else:
+        # Month ends, plus the last projected day
+        picked = [i for i in range(len(days))
+                  if i + 1 == len(days) or days[i + 1][:7] != days[i][:7]]
+    rows = []
+    previous = projection['opening']
+    for i in picked:
+        rows.append({'date': days[i], 'balance': balances[i], 'change': balances[i] - previous})
+        previous = balances[i]
+
+    if projection['first_negative']:
+        print(f"warning: balance goes below zero on {projection['first_negative']}",
+              file=sys.stderr)
+    Output(['date', 'balance', 'change'], args.format).rows(rows)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Personal finance tracker (command line)")
+    parser.add_argument('--file', default="transactions.json",
+                        help="ledger file (.json, .ledger for a binary snapshot,"
+                             " or .db/.sqlite for SQLite)")
+    parser.add_argument('--journal', action='store_true',
+                        help="append changes to a journal instead of rewriting the file")
+    parser.add_argument('--sharded', action='store_true',
+                        help="keep one file per month in a directory named after --file"
+                             " (migrates a single-file ledger; used automatically once split)")
+    parser.add_argument('--format', choices=FORMATS, default='text')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="add one transaction")
+    add.add_argument('amount', type=float)
+    add.add_argument('category')
+    add.add_argument('--type', default='expense', choices=['expense', 'income'])
+    add.add_argument('--date', help="YYYY-MM-DD, defaults to today")
+    add.set_defaults(func=cmd_add)
+
+    imp = commands.add_parser('import', help="bulk import a CSV/OFX/QFX/QIF statement")
+    imp.add_argument('path')
+    imp.add_argument('--kind', help="file format, when the extension doesn't tell")
+    imp.add_argument('--chunk-size', type=int, default=5000)
+    imp.add_argument('--progress', action='store_true')
+    imp.set_defaults(func=cmd_import)
+
+    balance = commands.add_parser('balance', help="income, expenses and available funds")
+    balance.add_argument('--on', help="just the balance at the end of this date (YYYY-MM-DD)")
+    balance.set_defaults(func=cmd_balance)
+    commands.add_parser('budget', help="budget status for this month") \
+            .set_defaults(func=cmd_budget)
+
+    monthly = commands.add_parser('monthly', help="income/expense summary per month")
+    monthly.add_argument('--months', type=int, help="only the last N months")
+    monthly.set_defaults(func=cmd_monthly)
+
+    export = commands.add_parser('export', help="transactions, oldest first")
+    export.add_argument('--since', help="first date to include (YYYY-MM-DD)")
+    export.add_argument('--until', help="last date to include (YYYY-MM-DD)")
+    export.add_argument('--category', action='append', help="only this category (repeatable)")
+    export.add_argument('--type', choices=['expense', 'income'])
+    export.set_defaults(func=cmd_export)
+
+    anomalies = commands.add_parser('anomalies', help="unusually large expenses")
+    anomalies.add_argument('--method', choices=['zscore', 'iqr'], default='zscore')
+    anomalies.add_argument('--since', help="only expenses from this date on (YYYY-MM-DD)")
+    anomalies.add_argument('--threshold', type=float, default=3.0,
+                           help="z-score at or above which an expense is flagged")
+    anomalies.add_argument('--factor', type=float, default=1.5,
+                           help="IQR multiple beyond the quartiles that is flagged")
+    anomalies.set_defaults(func=cmd_anomalies)
+
+    projection = commands.add_parser('forecast', help="projected balance for the months ahead")
+    projection.add_argument('--months', type=int, default=6)
+    projection.add_argument('--daily', action='store_true',
+                            help="every day instead of month ends")
+    projection.set_defaults(func=cmd_forecast)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # Output piped into e.g. `head`
+        return 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,44 +1,140 @@
+import os
 import re
-import dateparser
-from typing import Dict, Optional
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
 
-def extract_transaction_details(sentence: str) -> Optional[Dict]:
-    """Enhanced NLP parser for financial transactions"""
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Common date phrases resolved without dateparser
+_DATE_PHRASE = re.compile(
+    r"\b(?:(?:on|last)\s+)?(?P<phrase>(?:the\s+)?day\s+before\s+yesterday|yesterday|today|"
+    + "|".join(WEEKDAYS) + r"|\d{4}-\d{2}-\d{2}|\d+\s+(?:days?|weeks?)\s+ago)\b"
+)
+_AMOUNT = re.compile(r"(\d+\.?\d*)")
+_PREPOSITIONS = [re.compile(rf"\b{prep}\b") for prep in ("on", "for", "at")]
+_NON_WORDS = re.compile(r"\d+|\W+")
+_EXPENSE = re.compile("spent|paid|bought|purchase|cost")
+_INCOME = re.compile("got|earned|received|salary|income")
+
+# Inputs at least this long are split across worker processes
+PARALLEL_THRESHOLD = 5000
+
+
+@lru_cache(maxsize=1024)
+def _resolve_phrase(phrase: str, today: date) -> Optional[str]:
+    phrase = " ".join(phrase.split())
+    if phrase == "today":
+        return today.isoformat()
+    if phrase == "yesterday":
+        return (today - timedelta(days=1)).isoformat()
+    if phrase.endswith("before yesterday"):
+        return (today - timedelta(days=2)).isoformat()
+    if phrase.endswith(" ago"):
+        count, unit = phrase.split()[:2]
+        return (today - timedelta(**{unit.rstrip('s') + 's': int(count)})).isoformat()
+    if phrase in WEEKDAYS:
+        # Most recent past occurrence, as dateparser picks with PREFER_DATES_FROM=past
+        back = (today.weekday() - WEEKDAYS.index(phrase) - 1) % 7 + 1
+        return (today - timedelta(days=back)).isoformat()
+    try:
+        return date.fromisoformat(phrase).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _dateparser_date(sentence: str, today: date) -> Optional[str]:
+    # ``today`` only keys the cache, relative phrases change meaning daily.
+    # The keywords above are English, so skip dateparser's language detection.
+    # Imported here: it takes a while to load and the fast path rarely needs it
+    import dateparser
+
+    parsed_date = dateparser.parse(sentence, languages=['en'],
+                                   settings={'PREFER_DATES_FROM': 'past'})
+    return parsed_date.strftime("%Y-%m-%d") if parsed_date else None
+
+
+def _parse(sentence: str, today: date) -> Tuple[Optional[Dict], Optional[str]]:
+    """Parse one sentence into (transaction, None) or (None, error)"""
     sentence = sentence.lower().strip()
-    
+
+    # Date first, so the phrase does not leak into the amount or category
+    match = _DATE_PHRASE.search(sentence)
+    date_value = _resolve_phrase(match.group('phrase'), today) if match else None
+    if date_value:
+        text = sentence[:match.start()] + " " + sentence[match.end():]
+    else:
+        text = sentence
+
     # Improved amount extraction (handles decimals and currency symbols)
-    amount_match = re.search(r"(\d+\.?\d*)", sentence.replace(",", ""))
+    amount_match = _AMOUNT.search(text.replace(",", ""))
     amount = float(amount_match.group(1)) if amount_match else None
-    
+
     # Better category extraction
     category = "Uncategorized"
-    for prep in ["on", "for", "at"]:
-        if prep in sentence:
-            parts = sentence.split(prep)
-            if len(parts) > 1:
-                category = re.sub(r"\d+|\W+", " ", parts[1]).strip().title()
-                break
-    
+    for prep in _PREPOSITIONS:
+        parts = prep.split(text, maxsplit=1)
+        if len(parts) > 1:
+            category = _NON_WORDS.sub(" ", parts[1]).strip().title() or category
+            break
+
     # More robust type detection
-    expense_keywords = ["spent", "paid", "bought", "purchase", "cost"]
-    income_keywords = ["got", "earned", "received", "salary", "income"]
-    
     transaction_type = None
-    if any(word in sentence for word in expense_keywords):
+    if _EXPENSE.search(sentence):
         transaction_type = "expense"
-    elif any(word in sentence for word in income_keywords):
+    elif _INCOME.search(sentence):
         transaction_type = "income"
-    
-    # Better date parsing
-    parsed_date = dateparser.parse(sentence, settings={'PREFER_DATES_FROM': 'past'})
-    date = parsed_date.strftime("%Y-%m-%d") if parsed_date else None
-    
-    if not all([amount, transaction_type, date]):
-        return None
-        
+
+    if not amount:
+        return None, "no amount found"
+    if not transaction_type:
+        return None, "could not tell income from expense"
+    # dateparser on the whole sentence is slow, only try it as a last resort
+    date_value = date_value or _dateparser_date(sentence, today)
+    if not date_value:
+        return None, "no date found"
+
     return {
         "amount": round(float(amount), 2),
         "category": category,
         "type": transaction_type,
-        "date": date
-    }
\ No newline at end of file
+        "date": date_value
+    }, None
+
+
+def extract_transaction_details(sentence: str) -> Optional[Dict]:
+    """Enhanced NLP parser for financial transactions"""
+    return _parse(sentence, date.today())[0]
+
+
+def _parse_lines(lines: List[str], today: date) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    return [_parse(line, today) for line in lines]
+
+
+def extract_many(sentences: Iterable[str], workers: Optional[int] = None,
+                 chunk_size: int = 1000) -> List[Dict]:
+    """Parse many sentences, e.g. a pasted list, one per entry.
+
+    Returns one entry per input in input order, holding the line number,
+    the parsed ``transaction`` (or None) and an ``error`` message (or None).
+    Inputs of PARALLEL_THRESHOLD lines or more are split into chunks and
+    parsed in a process pool of ``workers`` processes.
+    """
+    lines = list(sentences)
+    today = date.today()
+    workers = workers if workers is not None else os.cpu_count() or 1
+
+    if len(lines) >= PARALLEL_THRESHOLD and workers > 1:
+        chunks = [lines[i:i + chunk_size] for i in range(0, len(lines), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = [result for chunk in pool.map(_parse_lines, chunks, [today] * len(chunks))
+                      for result in chunk]
+    else:
+        parsed = _parse_lines(lines, today)
+
+    return [
+        {'line': number, 'text': line, 'transaction': transaction, 'error': error}
+        for number, (line, (transaction, error)) in enumerate(zip(lines, parsed), start=1)
+    ]
@@ -0,0 +1,144 @@
+import calendar
+import heapq
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# How a rule repeats; rules saved before 'frequency' existed repeat every
+# 'interval' days
+FREQUENCIES = ('days', 'weeks', 'months', 'dates')
+
+
+def _parse(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value) if value else None
+
+
+def add_months(start: date, months: int, day: int) -> date:
+    month = start.month - 1 + months
+    year = start.year + month // 12
+    month = month % 12 + 1
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def validate_rule(rule: Dict):
+    """Raise ValueError unless ``rule`` describes a usable calendar"""
+    if rule.get('type') not in ('income', 'expense'):
+        raise ValueError(f"invalid type: {rule.get('type')!r}")
+    frequency = rule.get('frequency', 'days')
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {frequency}")
+    if frequency == 'dates':
+        if not rule.get('dates'):
+            raise ValueError("A custom calendar needs at least one date")
+        for value in rule['dates']:
+            date.fromisoformat(value)
+        return
+    if int(rule.get('interval', 0)) < 1:
+        raise ValueError("Interval must be at least 1")
+    weekday = rule.get('weekday', 0)
+    if frequency == 'weeks' and not (isinstance(weekday, int) and 0 <= weekday <= 6):
+        raise ValueError("Weekday must be between 0 (Monday) and 6 (Sunday)")
+    day = rule.get('day', 1)
+    if frequency == 'months' and not (isinstance(day, int) and 1 <= day <= 31):
+        raise ValueError("Day must be between 1 and 31")
+    _parse(rule.get('start'))
+
+
+def first_occurrence(rule: Dict, today: date) -> Optional[date]:
+    """First date a rule that was never applied is due"""
+    frequency = rule.get('frequency', 'days')
+    start = _parse(rule.get('start'))
+    if frequency == 'dates':
+        return _parse(min(rule['dates']))
+    if start is None:
+        # Legacy behaviour: a new rule is applied straight away
+        return today
+    if frequency == 'weeks':
+        return start + timedelta(days=(rule.get('weekday', start.weekday()) - start.weekday()) % 7)
+    if frequency == 'months':
+        day = rule.get('day', start.day)
+        first = add_months(start, 0, day)
+        return first if first >= start else add_months(start, 1, day)
+    return start
+
+
+def following(rule: Dict, last: date) -> Optional[date]:
+    """The occurrence after ``last``, or None when the calendar has ended"""
+    frequency = rule.get('frequency', 'days')
+    if frequency == 'dates':
+        later = [value for value in rule['dates'] if value > last.isoformat()]
+        return _parse(min(later)) if later else None
+    interval = int(rule['interval'])
+    if frequency == 'weeks':
+        return last + timedelta(weeks=interval)
+    if frequency == 'months':
+        return add_months(last, interval, rule.get('day', last.day))
+    return last + timedelta(days=interval)
+
+
+def next_due(rule: Dict, today: date) -> Optional[date]:
+    last = _parse(rule.get('last_applied'))
+    return following(rule, last) if last else first_occurrence(rule, today)
+
+
+def occurrences(rule: Dict, start: date, until: date) -> Iterator[date]:
+    """Every occurrence from ``start`` (itself an occurrence) through ``until``"""
+    current = start
+    while current is not None and current <= until:
+        yield current
+        current = following(rule, current)
+
+
+class RecurringScheduler:
+    """Recurring rules in a heap ordered by next due date.
+
+    Rules are referenced by their position in the tracker's ``recurring``
+    list; ``due`` pops every rule that has come due and pushes it back with
+    its next date, so a check costs O(log n) per rule applied rather than a
+    scan over all rules.
+    """
+
+    def __init__(self, rules: List[Dict], today: date):
+        self.rules = rules
+        self.heap: List[Tuple[date, int]] = []
+        for index, rule in enumerate(rules):
+            self.push(index, today)
+
+    def push(self, index: int, today: date):
+        try:
+            when = next_due(self.rules[index], today)
+        except (KeyError, TypeError, ValueError) as e:
+            # A damaged stored rule is left out rather than blocking the rest
+            print(f"Skipping recurring rule {index}: {e}")
+            return
+        if when is not None:
+            heapq.heappush(self.heap, (when, index))
+
+    def next_date(self) -> Optional[date]:
+        return self.heap[0][0] if self.heap else None
+
+    def due(self, today: date) -> List[Tuple[Dict, date]]:
+        """All (rule, date) occurrences up to and including ``today``.
+
+        Missed occurrences are all returned, oldest first per rule. The
+        rules' ``last_applied`` dates are advanced. A rule whose calendar
+        fails part way contributes nothing and is retried on the next call.
+        """
+        result = []
+        failed = []
+        while self.heap and self.heap[0][0] <= today:
+            when, index = heapq.heappop(self.heap)
+            rule = self.rules[index]
+            try:
+                found = list(occurrences(rule, when, today))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping recurring rule {index} ({rule.get('category')}): {e}")
+                failed.append((when, index))
+                continue
+            result.extend((rule, occurrence) for occurrence in found)
+            if found:
+                rule['last_applied'] = found[-1].isoformat()
+            self.push(index, today)
+        # Back with their old due date only now, or this loop would pop them again
+        for entry in failed:
+            heapq.heappush(self.heap, entry)
+        return result
@@ -0,0 +1,707 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data_handler import iter_ledger, read_snapshot, write_json_atomic, write_snapshot
+from store import TransactionStore
+
+# Snapshot keys replayed as whole-value records
+STATE_KEYS = ('budgets', 'recurring', 'notifications')
+
+
+def _rows_before(records: Iterator[Tuple[str, object]], until: str,
+                 since: Optional[str] = None) -> Iterator[Dict]:
+    rows = {}
+    for op, data in records:
+        if op == 'update':
+            rows.pop(data['old']['id'], None)
+            op, data = 'add', data['new']
+        if op == 'add' and data['date'] < until and (since is None or data['date'] >= since):
+            rows[data['id']] = data
+        elif op == 'delete':
+            rows.pop(data['id'], None)
+    return iter(rows.values())
+
+
+class Storage:
+    """Persistence backend used by FinanceTracker.
+
+    ``load`` streams the stored state as ``(op, data)`` records: one 'add'
+    per transaction, whole-value 'budgets'/'recurring'/'notifications'
+    records, then any incremental changes ('add', 'delete', 'update',
+    'budget', 'notify', 'recurring'). Transactions carry a stable 'id';
+    'update' data holds the 'old' and 'new' versions of a row. Columnar
+    backends may instead start with one 'store' record carrying every row
+    as a TransactionStore. ``log`` persists one change incrementally
+    (returning False when the backend can only rewrite everything, in which
+    case the tracker calls ``save``). Backends that set ``supports_queries``
+    also provide ``month_totals``, ``day_totals`` and ``amount_stats`` so
+    aggregates can be computed by the backend instead of by scanning every
+    row.
+    """
+
+    supports_queries = False
+    # Whether save() takes state['transactions'] as the TransactionStore itself
+    columnar = False
+
+    def load(self, since: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+        """Stream stored records; backends may skip rows dated before ``since``"""
+        raise NotImplementedError
+
+    def load_before(self, until: str, since: Optional[str] = None) -> Iterator[Dict]:
+        """Rows dated before ``until`` (and from ``since`` on) as of the last ``load``"""
+        return _rows_before(self.load(), until, since)
+
+    def max_id(self) -> int:
+        """Largest transaction id that ``load(since=...)`` may have skipped"""
+        return 0
+
+    def save(self, state: Dict):
+        raise NotImplementedError
+
+    def log(self, op: str, data) -> bool:
+        return False
+
+    def log_many(self, op: str, items: List) -> bool:
+        return all([self.log(op, data) for data in items])
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def compact(self, state: Dict):
+        pass
+
+    def compact_async(self, state: Dict):
+        pass
+
+    def close(self):
+        pass
+
+
+class JSONStorage(Storage):
+    """JSON snapshot file with an optional append-only journal.
+
+    With journaling enabled every change is appended as one JSON line to
+    ``<filename>.journal`` instead of rewriting the snapshot. The journal is
+    folded back into the snapshot on demand or in the background once it
+    holds more than ``compact_every`` records and at least as many records as
+    the snapshot has transactions, which keeps compaction cost amortized.
+    """
+
+    def __init__(self, filename: str, journal: bool = False,
+                 compact_every: int = 1000):
+        self.filename = filename
+        self.journal = journal
+        self.journal_file = filename + ".journal"
+        self.compact_every = compact_every
+        self._seq = 0
+        self._pending = 0
+        self._snapshot_size = 0
+        self._mark = 0
+        self._handle = None
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+
+    def load(self, since: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+        self._pending = 0
+        yield from self._records()
+        # Later paging reads exactly what this load saw
+        self._mark = self._seq
+
+    def load_before(self, until: str, since: Optional[str] = None) -> Iterator[Dict]:
+        return _rows_before(self._records(max_seq=self._mark, count=False), until, since)
+
+    def _records(self, max_seq: Optional[int] = None,
+                 count: bool = True) -> Iterator[Tuple[str, object]]:
+        snapshot_seq = 0
+        size = 0
+        try:
+            for op, data in self._read_snapshot():
+                if op == 'journal_seq':
+                    snapshot_seq = data
+                    continue
+                if op == 'add':
+                    size += 1
+                elif op == 'store':
+                    size += len(data)
+                yield op, data
+        except FileNotFoundError:
+            pass
+
+        if count:
+            self._seq = snapshot_seq
+            self._snapshot_size = size
+        if self.journal:
+            # A leftover ".old" file means a compaction was interrupted
+            for path in (self.journal_file + ".old", self.journal_file):
+                yield from self._replay(path, snapshot_seq, max_seq, count)
+
+    def _read_snapshot(self) -> Iterator[Tuple[str, object]]:
+        """Records of the snapshot file; 'journal_seq' says where the journal resumes"""
+        with open(self.filename, 'r') as f:
+            # Handle both old (list) and new (dict) formats
+            position = 0
+            for key, value in iter_ledger(f):
+                if key == 'transaction':
+                    position += 1
+                    # Ledgers written before ids existed get them by position
+                    if 'id' not in value:
+                        value['id'] = position
+                    yield 'add', value
+                elif key in STATE_KEYS or key in ('next_id', 'journal_seq'):
+                    yield key, value
+
+    def _replay(self, path: str, after_seq: int, max_seq: Optional[int],
+                count: bool) -> Iterator[Tuple[str, object]]:
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn write at the tail of the journal
+                        break
+                    if record['seq'] <= after_seq:
+                        continue
+                    if max_seq is not None and record['seq'] > max_seq:
+                        break
+                    if count:
+                        self._seq = max(self._seq, record['seq'])
+                        self._pending += 1
+                    yield record['op'], record['data']
+        except FileNotFoundError:
+            pass
+
+    def log(self, op: str, data) -> bool:
+        """Append a change to the journal; False if journaling is off"""
+        if not self.journal:
+            return False
+
+        with self._lock:
+            self._seq += 1
+            if self._handle is None:
+                self._handle = open(self.journal_file, 'a')
+            self._handle.write(json.dumps({'seq': self._seq, 'op': op, 'data': data}) + "\n")
+            self._handle.flush()
+            self._pending += 1
+        return True
+
+    def log_many(self, op: str, items: List) -> bool:
+        if not self.journal:
+            return False
+        if not items:
+            return True
+
+        with self._lock:
+            if self._handle is None:
+                self._handle = open(self.journal_file, 'a')
+            lines = []
+            for data in items:
+                self._seq += 1
+                lines.append(json.dumps({'seq': self._seq, 'op': op, 'data': data}) + "\n")
+            self._handle.write("".join(lines))
+            self._handle.flush()
+            self._pending += len(items)
+        return True
+
+    def needs_compaction(self) -> bool:
+        return (self.journal
+                and self._pending >= max(self.compact_every, self._snapshot_size)
+                and not self.compacting())
+
+    def compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def save(self, state: Dict):
+        """Write a full snapshot and discard the journal"""
+        self.wait()
+        with self._lock:
+            self._close_handle()
+            self._write_snapshot(state, self._seq)
+            for path in (self.journal_file, self.journal_file + ".old"):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._pending = 0
+
+    def compact(self, state: Dict):
+        if self.journal:
+            self.save(state)
+
+    def compact_async(self, state: Dict):
+        """Fold the journal into the snapshot on a background thread.
+
+        ``state`` must be a private copy: the caller keeps mutating its own
+        data while the snapshot is being written.
+        """
+        if not self.journal or self.compacting():
+            return
+
+        with self._lock:
+            self._close_handle()
+            if os.path.exists(self.journal_file):
+                os.replace(self.journal_file, self.journal_file + ".old")
+            seq = self._seq
+            self._pending = 0
+
+        def run():
+            self._write_snapshot(state, seq)
+            if os.path.exists(self.journal_file + ".old"):
+                os.remove(self.journal_file + ".old")
+
+        self._compactor = threading.Thread(target=run, daemon=True)
+        self._compactor.start()
+
+    def wait(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        self.wait()
+        with self._lock:
+            self._close_handle()
+
+    def _close_handle(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _write_snapshot(self, state: Dict, seq: int):
+        self._snapshot_size = len(state['transactions'])
+        data = dict(state)
+        if self.journal:
+            data['journal_seq'] = seq
+        write_json_atomic(self.filename, data, indent=4)
+
+
+class BinaryStorage(JSONStorage):
+    """JSONStorage with a compact binary snapshot in place of the JSON file.
+
+    The snapshot holds the store's columns as packed arrays (see
+    ``data_handler.write_snapshot``), so loading hands the tracker a ready
+    ``TransactionStore`` in one 'store' record instead of one 'add' per row;
+    every row is loaded, whatever ``since`` says. The optional journal is
+    the same JSON-lines file. Use ``data_handler.export_json`` and
+    ``import_json`` to convert to and from the JSON ledger.
+    """
+
+    columnar = True
+
+    def _read_snapshot(self) -> Iterator[Tuple[str, object]]:
+        store, state = read_snapshot(self.filename)
+        yield 'store', store
+        for key, value in state.items():
+            yield key, value
+
+    def _write_snapshot(self, state: Dict, seq: int):
+        store = state['transactions']
+        if not isinstance(store, TransactionStore):
+            store = TransactionStore(store)
+            store.next_id = max(store.next_id, state.get('next_id', 1))
+        self._snapshot_size = len(store)
+        data = {key: state[key] for key in STATE_KEYS}
+        if self.journal:
+            data['journal_seq'] = seq
+        write_snapshot(self.filename, store, data)
+
+
+_INSERT_TRANSACTION = "INSERT INTO transactions (id, amount, category, type, date) VALUES (?, ?, ?, ?, ?)"
+
+
+def _row_dict(row) -> Dict:
+    row_id, amount, category, trans_type, date = row
+    return {'id': row_id, 'amount': amount, 'category': category, 'type': trans_type, 'date': date}
+
+
+def _row_values(t: Dict) -> Tuple:
+    return t['id'], t['amount'], t['category'], t['type'], t['date']
+
+
+class SQLiteStorage(Storage):
+    """SQLite database with every change written as it happens"""
+
+    supports_queries = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_date
+            ON transactions (date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_category_date
+            ON transactions (category, date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_type_date
+            ON transactions (type, date);
+        CREATE TABLE IF NOT EXISTS budgets (
+            category TEXT PRIMARY KEY,
+            amount REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS recurring (
+            position INTEGER PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._mark = 0
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+
+    def load(self, since: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+        yield 'budgets', dict(self.conn.execute("SELECT category, amount FROM budgets"))
+        yield 'recurring', [
+            json.loads(data) for (data,) in
+            self.conn.execute("SELECT data FROM recurring ORDER BY position")
+        ]
+        yield 'notifications', [
+            json.loads(data) for (data,) in
+            self.conn.execute("SELECT data FROM notifications ORDER BY id")
+        ]
+
+        self._mark = self.max_id()
+        query = "SELECT id, amount, category, type, date FROM transactions"
+        params = []
+        if since is not None:
+            query += " WHERE date >= ?"
+            params.append(since)
+        for row in self.conn.execute(query + " ORDER BY id", params):
+            yield 'add', _row_dict(row)
+
+    def load_before(self, until: str, since: Optional[str] = None) -> Iterator[Dict]:
+        for row in self.conn.execute(
+                "SELECT id, amount, category, type, date FROM transactions"
+                " WHERE date < ? AND date >= ? AND id <= ? ORDER BY id",
+                (until, since or "", self._mark)):
+            yield _row_dict(row)
+
+    def max_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+
+    def save(self, state: Dict):
+        with self.conn:
+            self.conn.execute("DELETE FROM transactions")
+            self.conn.executemany(_INSERT_TRANSACTION, map(_row_values, state['transactions']))
+            self.conn.execute("DELETE FROM budgets")
+            self.conn.executemany("INSERT INTO budgets (category, amount) VALUES (?, ?)",
+                                  state['budgets'].items())
+            self._write_recurring(state['recurring'])
+            self.conn.execute("DELETE FROM notifications")
+            self.conn.executemany("INSERT INTO notifications (data) VALUES (?)",
+                                  ((json.dumps(n),) for n in state['notifications']))
+
+    def log(self, op: str, data) -> bool:
+        with self.conn:
+            if op == 'add':
+                self.conn.execute(_INSERT_TRANSACTION, _row_values(data))
+            elif op == 'delete':
+                self.conn.execute("DELETE FROM transactions WHERE id = ?", (data['id'],))
+            elif op == 'update':
+                new = data['new']
+                self.conn.execute(
+                    "UPDATE transactions SET amount = ?, category = ?, type = ?, date = ? WHERE id = ?",
+                    (new['amount'], new['category'], new['type'], new['date'], new['id']))
+            elif op == 'budget':
+                self.conn.execute("INSERT OR REPLACE INTO budgets (category, amount) VALUES (?, ?)",
+                                  (data['category'], data['limit']))
+            elif op == 'notify':
+                self.conn.execute("INSERT INTO notifications (data) VALUES (?)", (json.dumps(data),))
+            elif op == 'recurring':
+                self._write_recurring(data)
+            else:
+                raise ValueError(f"Unknown storage operation: {op}")
+        return True
+
+    def log_many(self, op: str, items: List) -> bool:
+        if op != 'add':
+            return super().log_many(op, items)
+        with self.conn:
+            self.conn.executemany(_INSERT_TRANSACTION, map(_row_values, items))
+        return True
+
+    def _write_recurring(self, rules: List[Dict]):
+        self.conn.execute("DELETE FROM recurring")
+        self.conn.executemany("INSERT INTO recurring (position, data) VALUES (?, ?)",
+                              ((i, json.dumps(rt)) for i, rt in enumerate(rules)))
+
+    def month_totals(self) -> List[Tuple[str, str, str, float]]:
+        """(month, type, category, total) rows aggregated by the database"""
+        return self.conn.execute(
+            "SELECT substr(date, 1, 7), type, category, SUM(amount) FROM transactions"
+            " GROUP BY substr(date, 1, 7), type, category").fetchall()
+
+    def day_totals(self) -> List[Tuple[str, str, float]]:
+        """(date, type, total) rows aggregated by the database"""
+        return self.conn.execute(
+            "SELECT date, type, SUM(amount) FROM transactions GROUP BY date, type").fetchall()
+
+    def amount_stats(self) -> List[Tuple[str, str, int, float, float]]:
+        """(type, category, count, sum, sum of squares) rows aggregated by the database"""
+        return self.conn.execute(
+            "SELECT type, category, COUNT(*), SUM(amount), SUM(amount * amount)"
+            " FROM transactions GROUP BY type, category").fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+_SHARD_NAME = re.compile(r"^(\d{4}-\d{2})\.json$")
+
+
+def shard_directory(filename: str) -> str:
+    """Directory that holds the sharded form of the ledger ``filename``"""
+    stem = os.path.splitext(filename)[0]
+    return stem if stem != filename else filename + ".d"
+
+
+def _summarize(rows: List[Dict]) -> Dict:
+    """Per-shard aggregates kept in the manifest in place of the rows"""
+    totals = defaultdict(lambda: defaultdict(float))
+    days = defaultdict(lambda: defaultdict(float))
+    stats = defaultdict(dict)
+    for t in rows:
+        trans_type, category, amount = t['type'], t['category'], t['amount']
+        totals[trans_type][category] += amount
+        days[trans_type][t['date']] += amount
+        entry = stats[trans_type].setdefault(category, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += amount
+        entry[2] += amount * amount
+    return {'count': len(rows), 'max_id': max((t['id'] for t in rows), default=0),
+            'totals': totals, 'days': days, 'stats': stats}
+
+
+class ShardedStorage(Storage):
+    """A directory with one JSON file per month plus a manifest.
+
+    ``manifest.json`` holds the budgets, recurring rules, notifications,
+    next id and, per month, the totals that stand in for that month's rows;
+    ``YYYY-MM.json`` holds the month's transactions. A change rewrites only
+    the months it touches and the manifest, and ``load(since)`` reads only
+    the months from ``since`` on. A single-file ledger at ``filename`` is
+    migrated on first open and kept as ``<filename>.migrated``.
+    """
+
+    supports_queries = True
+    MANIFEST = "manifest.json"
+
+    def __init__(self, filename: str):
+        legacy = None if os.path.isdir(filename) else filename
+        self.filename = filename if legacy is None else shard_directory(filename)
+        self.manifest_file = os.path.join(self.filename, self.MANIFEST)
+        # Running total of shard and manifest bytes written, for instrumentation
+        self.bytes_written = 0
+        os.makedirs(self.filename, exist_ok=True)
+        try:
+            with open(self.manifest_file, 'r') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = None
+        if self.manifest is not None:
+            self._recover()
+        elif legacy and os.path.exists(legacy):
+            self._migrate(legacy)
+        else:
+            self.manifest = {'budgets': {}, 'recurring': [], 'notifications': [],
+                             'next_id': 1, 'shards': {}}
+            self._write_manifest()
+
+    def _shard_file(self, month: str) -> str:
+        return os.path.join(self.filename, month + ".json")
+
+    def _read_shard(self, month: str) -> List[Dict]:
+        try:
+            with open(self._shard_file(month), 'r') as f:
+                return json.load(f)['transactions']
+        except FileNotFoundError:
+            return []
+
+    def _write_shard(self, month: str, rows: List[Dict]):
+        if rows:
+            write_json_atomic(self._shard_file(month), {'month': month, 'transactions': rows})
+            self.bytes_written += os.path.getsize(self._shard_file(month))
+            self._set_summary(month, rows)
+        else:
+            if os.path.exists(self._shard_file(month)):
+                os.remove(self._shard_file(month))
+            self.manifest['shards'].pop(month, None)
+
+    def _set_summary(self, month: str, rows: List[Dict]):
+        summary = self.manifest['shards'][month] = _summarize(rows)
+        self.manifest['next_id'] = max(self.manifest['next_id'], summary['max_id'] + 1)
+
+    def _write_manifest(self):
+        write_json_atomic(self.manifest_file, self.manifest)
+        self.bytes_written += os.path.getsize(self.manifest_file)
+
+    def _recover(self):
+        """Re-summarize shards written after the manifest (a crash between the two)"""
+        written = os.path.getmtime(self.manifest_file)
+        shards = self.manifest['shards']
+        months = set()
+        changed = False
+        for name in os.listdir(self.filename):
+            match = _SHARD_NAME.match(name)
+            if not match:
+                continue
+            month = match.group(1)
+            months.add(month)
+            if month in shards and os.path.getmtime(os.path.join(self.filename, name)) < written:
+                continue
+            rows = self._read_shard(month)
+            if json.loads(json.dumps(_summarize(rows))) != shards.get(month):
+                self._set_summary(month, rows)
+                changed = True
+        for month in set(shards) - months:
+            del shards[month]
+            changed = True
+        if changed:
+            self._write_manifest()
+
+    def _migrate(self, legacy: str):
+        rows = {}
+        state = {'budgets': {}, 'recurring': [], 'notifications': [], 'next_id': 1}
+        for op, data in JSONStorage(legacy, journal=True).load():
+            if op == 'update':
+                rows.pop(data['old']['id'], None)
+                op, data = 'add', data['new']
+            if op == 'add':
+                rows[data['id']] = data
+            elif op == 'delete':
+                rows.pop(data['id'], None)
+            elif op == 'budget':
+                state['budgets'][data['category']] = data['limit']
+            elif op == 'notify':
+                state['notifications'].append(data)
+            else:
+                state[op] = data
+        state['transactions'] = rows.values()
+        self.manifest = {'shards': {}}
+        self.save(state)
+        for path in (legacy, legacy + ".journal", legacy + ".journal.old"):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+
+    def load(self, since: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+        manifest = self.manifest
+        yield 'budgets', dict(manifest['budgets'])
+        yield 'recurring', [dict(rule) for rule in manifest['recurring']]
+        yield 'notifications', list(manifest['notifications'])
+        yield 'next_id', manifest['next_id']
+        for month in sorted(manifest['shards']):
+            if since is None or month >= since[:7]:
+                for row in self._read_shard(month):
+                    yield 'add', row
+
+    def load_before(self, until: str, since: Optional[str] = None) -> Iterator[Dict]:
+        """Rows dated in [``since``, ``until``) as stored now.
+
+        Rows added or moved there since the last ``load`` are included too;
+        the tracker skips the ones it already holds.
+        """
+        for month in sorted(self.manifest['shards']):
+            if month > until[:7] or (since is not None and month < since[:7]):
+                continue
+            for row in self._read_shard(month):
+                if row['date'] < until and (since is None or row['date'] >= since):
+                    yield row
+
+    def max_id(self) -> int:
+        return self.manifest['next_id'] - 1
+
+    def save(self, state: Dict):
+        months = defaultdict(list)
+        for t in state['transactions']:
+            months[t['date'][:7]].append(_row_dict(_row_values(t)))
+        for month in set(self.manifest['shards']) - set(months):
+            self._write_shard(month, [])
+        self.manifest = {'budgets': dict(state['budgets']),
+                         'recurring': [dict(rule) for rule in state['recurring']],
+                         'notifications': list(state['notifications']),
+                         'next_id': state.get('next_id', 1), 'shards': {}}
+        for month, rows in months.items():
+            self._write_shard(month, rows)
+        self._write_manifest()
+
+    def log(self, op: str, data) -> bool:
+        return self.log_many(op, [data])
+
+    def log_many(self, op: str, items: List) -> bool:
+        """Apply the changes to the months they touch and rewrite only those"""
+        if not items:
+            return True
+        shards: Dict[str, Dict[int, Dict]] = {}
+
+        def rows(month: str) -> Dict[int, Dict]:
+            if month not in shards:
+                shards[month] = {t['id']: t for t in self._read_shard(month)}
+            return shards[month]
+
+        manifest = self.manifest
+        for data in items:
+            if op == 'add':
+                rows(data['date'][:7])[data['id']] = _row_dict(_row_values(data))
+            elif op == 'delete':
+                rows(data['date'][:7]).pop(data['id'], None)
+            elif op == 'update':
+                old, new = data['old'], data['new']
+                rows(old['date'][:7]).pop(old['id'], None)
+                rows(new['date'][:7])[new['id']] = _row_dict(_row_values(new))
+            elif op == 'budget':
+                manifest['budgets'][data['category']] = data['limit']
+            elif op == 'notify':
+                manifest['notifications'].append(data)
+            elif op == 'recurring':
+                manifest['recurring'] = [dict(rule) for rule in data]
+            else:
+                raise ValueError(f"Unknown storage operation: {op}")
+        for month, by_id in shards.items():
+            self._write_shard(month, list(by_id.values()))
+        self._write_manifest()
+        return True
+
+    def month_totals(self) -> List[Tuple[str, str, str, float]]:
+        return [(month, trans_type, category, total)
+                for month, shard in self.manifest['shards'].items()
+                for trans_type, by_category in shard['totals'].items()
+                for category, total in by_category.items()]
+
+    def day_totals(self) -> List[Tuple[str, str, float]]:
+        return [(day, trans_type, total)
+                for shard in self.manifest['shards'].values()
+                for trans_type, by_day in shard['days'].items()
+                for day, total in by_day.items()]
+
+    def amount_stats(self) -> List[Tuple[str, str, int, float, float]]:
+        return [(trans_type, category, *entry)
+                for shard in self.manifest['shards'].values()
+                for trans_type, by_category in shard['stats'].items()
+                for category, entry in by_category.items()]
+
+
+def open_storage(filename: str, journal: bool = False, sharded: bool = False) -> Storage:
+    """Pick a backend from the file extension.
+
+    A directory, or a ledger that was already split into one, opens as
+    month shards; ``sharded`` migrates a single-file JSON ledger to them.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteStorage(filename)
+    if extension == '.ledger':
+        return BinaryStorage(filename, journal=journal)
+    if sharded or os.path.isdir(filename) or os.path.isdir(shard_directory(filename)):
+        return ShardedStorage(filename)
+    return JSONStorage(filename, journal=journal)
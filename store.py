@@ -0,0 +1,556 @@
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+from itertools import chain
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy comes with pandas; fall back to plain loops without it
+    np = None
+
+FIELDS = ('id', 'amount', 'category', 'type', 'date')
+GROUP_FIELDS = ('date', 'month', 'year', 'category', 'type')
+
+# Date index keys pack (date ordinal, id) into one int, so sorting them
+# orders rows by date with ties in id order
+ID_BITS = 40
+ID_MASK = (1 << ID_BITS) - 1
+# Changes buffered before the date index is rebuilt rather than patched
+PENDING_LIMIT = 64
+
+
+def date_to_ordinal(value: str) -> int:
+    return date.fromisoformat(value).toordinal()
+
+
+@lru_cache(maxsize=None)
+def ordinal_to_date(ordinal: int) -> str:
+    return date.fromordinal(ordinal).isoformat()
+
+
+@lru_cache(maxsize=None)
+def ordinal_to_month(ordinal: int) -> str:
+    return ordinal_to_date(ordinal)[:7]
+
+
+class TransactionRow(Mapping):
+    """Read-only dict-like view of one row in a TransactionStore"""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: "TransactionStore", index: int):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        store = self.store
+        i = self.index
+        if key == 'id':
+            return store.ids[i]
+        if key == 'amount':
+            return store.amounts[i]
+        if key == 'category':
+            return store.category_names[store.categories[i]]
+        if key == 'type':
+            return store.type_names[store.types[i]]
+        if key == 'date':
+            return ordinal_to_date(store.dates[i])
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class TransactionStore:
+    """Column-oriented transaction storage with a list-like read API.
+
+    Amounts live in a float array, dates as ordinal ints and category/type
+    as codes into small string tables. Every row carries a stable integer
+    id; deleting swaps the last row into the freed slot, so lookups and
+    deletes by id are O(1). Iterating or indexing yields ``TransactionRow``
+    views that behave like the dicts they replace. Row views hold a
+    position, so they go stale once the store is modified.
+
+    ``select`` answers filtered queries from a date-sorted index plus one
+    posting list per category, built on first use and patched on changes.
+    """
+
+    def __init__(self, rows: Iterable[Dict] = ()):
+        self.ids = array('q')
+        self.amounts = array('d')
+        self.dates = array('i')
+        self.categories = array('i')
+        self.types = array('b')
+        self.category_names: List[str] = []
+        self.type_names: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        self._type_codes: Dict[str, int] = {}
+        self._positions: Dict[int, int] = {}
+        self.next_id = 1
+        # Bumped on every mutation; keys the cached selections
+        self.version = 0
+        self._selections: Dict[Tuple, Tuple[int, List[int]]] = {}
+        # Sorted date keys, the same per category code, and (code, key)
+        # pairs added since; None until the first query
+        self._date_keys: Optional[array] = None
+        self._postings: Dict[int, array] = {}
+        self._pending: List[Tuple[int, int]] = []
+        self.extend(rows)
+
+    @staticmethod
+    def _code(names: List[str], codes: Dict[str, int], value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def category_code(self, category: str) -> Optional[int]:
+        return self._category_codes.get(category)
+
+    def type_code(self, trans_type: str) -> Optional[int]:
+        return self._type_codes.get(trans_type)
+
+    def append(self, transaction: Dict) -> int:
+        """Add a row, keeping its 'id' if it has one; returns the id"""
+        row_id = transaction.get('id')
+        if row_id is None:
+            row_id = self.next_id
+        elif row_id in self._positions:
+            raise ValueError(f"Duplicate transaction id {row_id}")
+        self.next_id = max(self.next_id, row_id + 1)
+
+        self._positions[row_id] = len(self.ids)
+        self.ids.append(row_id)
+        self.amounts.append(transaction['amount'])
+        self.dates.append(date_to_ordinal(transaction['date']))
+        self.categories.append(self._code(self.category_names, self._category_codes,
+                                          transaction['category']))
+        self.types.append(self._code(self.type_names, self._type_codes, transaction['type']))
+        self._index_row(len(self.ids) - 1)
+        self.version += 1
+        return row_id
+
+    def extend(self, rows: Iterable[Dict]):
+        # Bulk loads rebuild the date index on the next query instead
+        self._date_keys = None
+        for t in rows:
+            self.append(t)
+
+    @classmethod
+    def from_arrays(cls, ids: array, amounts: array, dates: array, categories: array,
+                    types: array, category_names: List[str],
+                    type_names: List[str]) -> "TransactionStore":
+        """A store adopting ready-made columns, e.g. read from a binary snapshot"""
+        if not len(ids) == len(amounts) == len(dates) == len(categories) == len(types):
+            raise ValueError("Columns differ in length")
+        store = cls()
+        store.ids, store.amounts, store.dates = ids, amounts, dates
+        store.categories, store.types = categories, types
+        store.category_names = list(category_names)
+        store.type_names = list(type_names)
+        store._category_codes = {name: code for code, name in enumerate(store.category_names)}
+        store._type_codes = {name: code for code, name in enumerate(store.type_names)}
+        store._positions = dict(zip(ids, range(len(ids))))
+        if len(store._positions) != len(ids):
+            raise ValueError("Duplicate transaction id")
+        store.next_id = max(ids, default=0) + 1
+        return store
+
+    def copy(self) -> "TransactionStore":
+        """An independent store with the same rows, ids and codes"""
+        store = TransactionStore.from_arrays(
+            array('q', self.ids), array('d', self.amounts), array('i', self.dates),
+            array('i', self.categories), array('b', self.types),
+            self.category_names, self.type_names)
+        store.next_id = self.next_id
+        return store
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __iter__(self) -> Iterator[TransactionRow]:
+        for i in range(len(self.amounts)):
+            yield TransactionRow(self, i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [TransactionRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return TransactionRow(self, index)
+
+    def __delitem__(self, index: int):
+        last = len(self.ids) - 1
+        if index < 0:
+            index += last + 1
+        self._unindex_row(index)
+        del self._positions[self.ids[index]]
+        if index != last:
+            for column in (self.ids, self.amounts, self.dates, self.categories, self.types):
+                column[index] = column[last]
+            self._positions[self.ids[index]] = index
+        for column in (self.ids, self.amounts, self.dates, self.categories, self.types):
+            column.pop()
+        self.version += 1
+
+    def position(self, row_id: int) -> Optional[int]:
+        return self._positions.get(row_id)
+
+    def get(self, row_id: int) -> Optional[TransactionRow]:
+        index = self._positions.get(row_id)
+        return TransactionRow(self, index) if index is not None else None
+
+    def remove(self, row_id: int) -> Dict:
+        """Delete a row by id and return it as a dict"""
+        index = self._positions[row_id]
+        record = self.row(index)
+        del self[index]
+        return record
+
+    def update(self, row_id: int, transaction: Dict):
+        index = self._positions[row_id]
+        self._unindex_row(index)
+        self.amounts[index] = transaction['amount']
+        self.dates[index] = date_to_ordinal(transaction['date'])
+        self.categories[index] = self._code(self.category_names, self._category_codes,
+                                            transaction['category'])
+        self.types[index] = self._code(self.type_names, self._type_codes, transaction['type'])
+        self._index_row(index)
+        self.version += 1
+
+    def row(self, index: int) -> Dict:
+        return dict(TransactionRow(self, index))
+
+    def index(self, transaction: Dict) -> int:
+        """Position of ``transaction``: by id when it has one, else the first equal row"""
+        if transaction.get('id') is not None:
+            index = self._positions.get(transaction['id'])
+            if index is None:
+                raise ValueError("transaction not in store")
+            return index
+
+        category = self.category_code(transaction['category'])
+        trans_type = self.type_code(transaction['type'])
+        ordinal = date_to_ordinal(transaction['date'])
+        amount = transaction['amount']
+        if category is not None and trans_type is not None:
+            for i, value in enumerate(self.amounts):
+                if (value == amount and self.dates[i] == ordinal
+                        and self.categories[i] == category and self.types[i] == trans_type):
+                    return i
+        raise ValueError("transaction not in store")
+
+    def _sort_key(self, field: str) -> List:
+        if field == 'amount':
+            return self.amounts
+        if field == 'date':
+            return self.dates
+        if field in ('category', 'type'):
+            names = self.category_names if field == 'category' else self.type_names
+            codes = self.categories if field == 'category' else self.types
+            rank = [0] * len(names)
+            for position, code in enumerate(sorted(range(len(names)), key=names.__getitem__)):
+                rank[code] = position
+            return [rank[c] for c in codes]
+        raise ValueError(f"Cannot sort by {field!r}")
+
+    def _key(self, index: int) -> int:
+        return self.dates[index] << ID_BITS | self.ids[index]
+
+    def _index_row(self, index: int):
+        if self._date_keys is not None:
+            self._pending.append((self.categories[index], self._key(index)))
+
+    def _unindex_row(self, index: int):
+        if self._date_keys is None:
+            return
+        code, key = self.categories[index], self._key(index)
+        try:
+            self._pending.remove((code, key))
+            return
+        except ValueError:
+            pass
+        for keys in (self._date_keys, self._postings[code]):
+            del keys[bisect_left(keys, key)]
+
+    def _build_index(self):
+        postings: Dict[int, array] = {}
+        if np is not None and len(self):
+            keys = (np.frombuffer(self.dates, dtype=np.intc).astype(np.int64) << ID_BITS
+                    | np.frombuffer(self.ids, dtype=np.int64))
+            order = np.argsort(keys)
+            keys = keys[order]
+            codes = np.frombuffer(self.categories, dtype=np.intc)[order]
+            for code in np.unique(codes).tolist():
+                postings[code] = array('q', keys[codes == code].tobytes())
+            date_keys = array('q', keys.tobytes())
+        else:
+            pairs = sorted(zip((d << ID_BITS | i for d, i in zip(self.dates, self.ids)),
+                               self.categories))
+            date_keys = array('q', (key for key, _ in pairs))
+            for key, code in pairs:
+                postings.setdefault(code, array('q')).append(key)
+        self._date_keys = date_keys
+        self._postings = postings
+
+    def _index(self) -> Tuple[array, Dict[int, array]]:
+        """The date index, brought up to date with the pending changes"""
+        if self._date_keys is None or len(self._pending) > PENDING_LIMIT:
+            self._build_index()
+        else:
+            for code, key in self._pending:
+                insort(self._date_keys, key)
+                insort(self._postings.setdefault(code, array('q')), key)
+        self._pending = []
+        return self._date_keys, self._postings
+
+    def _ranges(self, since: Optional[str], until: Optional[str],
+                categories: Optional[Iterable[str]]) -> List[Tuple[array, int, int]]:
+        """(sorted keys, lo, hi) spans holding the rows within the dates"""
+        date_keys, postings = self._index()
+        if categories is None:
+            sources = [date_keys]
+        else:
+            if isinstance(categories, str):
+                categories = [categories]
+            codes = {self.category_code(c) for c in categories}
+            sources = [postings[code] for code in codes if code in postings]
+        low = date_to_ordinal(since) << ID_BITS if since else None
+        high = (date_to_ordinal(until) + 1) << ID_BITS if until else None
+        spans = []
+        for keys in sources:
+            lo = bisect_left(keys, low) if low is not None else 0
+            hi = bisect_left(keys, high) if high is not None else len(keys)
+            spans.append((keys, lo, max(lo, hi)))
+        return spans
+
+    def count(self, since: Optional[str] = None, until: Optional[str] = None,
+              categories: Optional[Iterable[str]] = None, trans_type: Optional[str] = None,
+              min_amount: Optional[float] = None, max_amount: Optional[float] = None) -> int:
+        """Number of rows ``select`` would return"""
+        if trans_type is None and min_amount is None and max_amount is None:
+            return sum(hi - lo for _, lo, hi in self._ranges(since, until, categories))
+        return len(self.select(since, until, categories, trans_type, min_amount, max_amount))
+
+    def select(self, since: Optional[str] = None, until: Optional[str] = None,
+               categories: Optional[Iterable[str]] = None, trans_type: Optional[str] = None,
+               min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+               sort_by: str = 'date', reverse: bool = False, offset: int = 0,
+               limit: Optional[int] = None) -> List[int]:
+        """Positions of the matching rows, cached until the next change.
+
+        ``since`` and ``until`` are inclusive ISO dates and ``categories``
+        one name or several. Dates and categories are looked up in the
+        index, so the cost is O(log n + k) for k rows in range; type and
+        amount are checked on those k rows. ``offset``/``limit`` pick one
+        window; in date order without type or amount filters that window is
+        cut from the index directly, at O(log n + limit).
+        """
+        if categories is not None and not isinstance(categories, str):
+            categories = tuple(sorted(categories))
+        if (limit is not None and sort_by == 'date' and trans_type is None
+                and min_amount is None and max_amount is None):
+            spans = self._ranges(since, until, categories)
+            if len(spans) <= 1:
+                return self._window(spans, offset, limit, reverse)
+        if offset or limit is not None:
+            end = offset + limit if limit is not None else None
+            return self.select(since, until, categories, trans_type, min_amount, max_amount,
+                               sort_by, reverse)[offset:end]
+        cache_key = (since, until, categories, trans_type, min_amount, max_amount,
+                     sort_by, reverse)
+        cached = self._selections.get(cache_key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+
+        spans = self._ranges(since, until, categories)
+        if len(spans) == 1:
+            keys, lo, hi = spans[0]
+            keys = keys[lo:hi]
+        else:
+            # Each posting slice is already sorted, so this is a run merge
+            keys = sorted(chain.from_iterable(keys[lo:hi] for keys, lo, hi in spans))
+        positions = self._positions
+        selected = [positions[key & ID_MASK] for key in keys]
+
+        if trans_type is not None:
+            code = self.type_code(trans_type)
+            types = self.types
+            selected = [i for i in selected if types[i] == code]
+        if min_amount is not None or max_amount is not None:
+            amounts = self.amounts
+            low = min_amount if min_amount is not None else float('-inf')
+            high = max_amount if max_amount is not None else float('inf')
+            selected = [i for i in selected if low <= amounts[i] <= high]
+
+        if sort_by != 'date':
+            # Stable, so equal values stay in date order
+            key = self._sort_key(sort_by)
+            selected.sort(key=key.__getitem__, reverse=reverse)
+        elif reverse:
+            selected.reverse()
+
+        self._selections = {k: v for k, v in self._selections.items() if v[0] == self.version}
+        self._selections[cache_key] = (self.version, selected)
+        return selected
+
+    def _window(self, spans: List[Tuple[array, int, int]], offset: int, limit: int,
+                reverse: bool) -> List[int]:
+        if not spans:
+            return []
+        keys, lo, hi = spans[0]
+        if reverse:
+            keys = keys[max(lo, hi - offset - limit):max(lo, hi - offset)][::-1]
+        else:
+            keys = keys[min(hi, lo + offset):min(hi, lo + offset + limit)]
+        positions = self._positions
+        return [positions[key & ID_MASK] for key in keys]
+
+    def aggregate(self, positions: Iterable[int], group_by=('category',)) -> Dict:
+        """Amount totals of the rows at ``positions``, grouped by GROUP_FIELDS.
+
+        Keys are single values when ``group_by`` names one field, else tuples.
+        """
+        fields = (group_by,) if isinstance(group_by, str) else tuple(group_by)
+        getters = []
+        for field in fields:
+            if field == 'date':
+                getters.append(lambda i: ordinal_to_date(self.dates[i]))
+            elif field == 'month':
+                getters.append(lambda i: ordinal_to_month(self.dates[i]))
+            elif field == 'year':
+                getters.append(lambda i: ordinal_to_month(self.dates[i])[:4])
+            elif field == 'category':
+                getters.append(lambda i: self.category_names[self.categories[i]])
+            elif field == 'type':
+                getters.append(lambda i: self.type_names[self.types[i]])
+            else:
+                raise ValueError(f"Cannot group by {field!r}")
+
+        amounts = self.amounts
+        totals: Dict = {}
+        if len(getters) == 1:
+            get = getters[0]
+            for i in positions:
+                key = get(i)
+                totals[key] = totals.get(key, 0.0) + amounts[i]
+        else:
+            for i in positions:
+                key = tuple(get(i) for get in getters)
+                totals[key] = totals.get(key, 0.0) + amounts[i]
+        return totals
+
+    def to_dicts(self) -> List[Dict]:
+        categories = self.category_names
+        types = self.type_names
+        return [
+            {'id': row_id, 'amount': amount, 'category': categories[c], 'type': types[t],
+             'date': ordinal_to_date(d)}
+            for row_id, amount, c, t, d in zip(self.ids, self.amounts, self.categories,
+                                               self.types, self.dates)
+        ]
+
+    def to_columns(self) -> Dict[str, List]:
+        """Column lists suitable for ``pandas.DataFrame``"""
+        return {
+            'id': list(self.ids),
+            'amount': list(self.amounts),
+            'category': [self.category_names[c] for c in self.categories],
+            'type': [self.type_names[t] for t in self.types],
+            'date': [ordinal_to_date(d) for d in self.dates]
+        }
+
+    def group_totals(self) -> Dict[Tuple[str, str, str], float]:
+        """Totals keyed by (year-month, type, category)"""
+        if not len(self):
+            return {}
+
+        if np is not None:
+            ordinals, day_index = np.unique(np.frombuffer(self.dates, dtype=np.intc),
+                                            return_inverse=True)
+            month_names, month_of_day = np.unique([ordinal_to_month(int(o)) for o in ordinals],
+                                                  return_inverse=True)
+            n_types = len(self.type_names)
+            n_categories = len(self.category_names)
+            keys = ((month_of_day[day_index].astype(np.int64) * n_types
+                     + np.frombuffer(self.types, dtype=np.int8)) * n_categories
+                    + np.frombuffer(self.categories, dtype=np.intc))
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse, weights=np.frombuffer(self.amounts, dtype=np.float64))
+            totals = {}
+            for key, total in zip(unique_keys.tolist(), sums.tolist()):
+                rest, category = divmod(key, n_categories)
+                month, trans_type = divmod(rest, n_types)
+                totals[(str(month_names[month]), self.type_names[trans_type],
+                        self.category_names[category])] = total
+            return totals
+
+        totals: Dict[Tuple[str, str, str], float] = {}
+        for amount, d, t, c in zip(self.amounts, self.dates, self.types, self.categories):
+            key = (ordinal_to_month(d), self.type_names[t], self.category_names[c])
+            totals[key] = totals.get(key, 0.0) + amount
+        return totals
+
+    def day_totals(self) -> Dict[Tuple[str, str], float]:
+        """Totals keyed by (date, type)"""
+        if not len(self):
+            return {}
+
+        if np is not None:
+            n_types = len(self.type_names)
+            keys = (np.frombuffer(self.dates, dtype=np.intc).astype(np.int64) * n_types
+                    + np.frombuffer(self.types, dtype=np.int8))
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse, weights=np.frombuffer(self.amounts, dtype=np.float64))
+            totals = {}
+            for key, total in zip(unique_keys.tolist(), sums.tolist()):
+                ordinal, trans_type = divmod(key, n_types)
+                totals[(ordinal_to_date(ordinal), self.type_names[trans_type])] = total
+            return totals
+
+        totals: Dict[Tuple[str, str], float] = {}
+        for amount, d, t in zip(self.amounts, self.dates, self.types):
+            key = (ordinal_to_date(d), self.type_names[t])
+            totals[key] = totals.get(key, 0.0) + amount
+        return totals
+
+    def amount_stats(self) -> Dict[Tuple[str, str], Tuple[int, float, float]]:
+        """(count, sum, sum of squares) of amounts keyed by (type, category)"""
+        if not len(self):
+            return {}
+
+        if np is not None:
+            n_categories = len(self.category_names)
+            keys = (np.frombuffer(self.types, dtype=np.int8).astype(np.int64) * n_categories
+                    + np.frombuffer(self.categories, dtype=np.intc))
+            amounts = np.frombuffer(self.amounts, dtype=np.float64)
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inverse)
+            sums = np.bincount(inverse, weights=amounts)
+            squares = np.bincount(inverse, weights=amounts * amounts)
+            stats = {}
+            for key, count, total, square in zip(unique_keys.tolist(), counts.tolist(),
+                                                 sums.tolist(), squares.tolist()):
+                trans_type, category = divmod(key, n_categories)
+                stats[(self.type_names[trans_type], self.category_names[category])] = \
+                    (count, total, square)
+            return stats
+
+        stats: Dict[Tuple[str, str], Tuple[int, float, float]] = {}
+        for amount, t, c in zip(self.amounts, self.types, self.categories):
+            key = (self.type_names[t], self.category_names[c])
+            count, total, square = stats.get(key, (0, 0.0, 0.0))
+            stats[key] = (count + 1, total + amount, square + amount * amount)
+        return stats
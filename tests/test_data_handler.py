@@ -0,0 +1,60 @@
+import io
+import json
+
+import pytest
+
+from data_handler import iter_ledger, write_json_atomic
+
+TRANSACTIONS = [
+    {'id': 1, 'amount': 12.5, 'category': 'food', 'type': 'expense', 'date': '2024-01-05'},
+    {'id': 2, 'amount': 100.0, 'category': 'pay', 'type': 'income', 'date': '2024-01-06'},
+]
+
+
+def parse(data, chunk_size):
+    return list(iter_ledger(io.StringIO(json.dumps(data, indent=2)), chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 1 << 16])
+def test_dict_layout(chunk_size):
+    data = {'transactions': TRANSACTIONS, 'budgets': {'food': 200.0},
+            'recurring': [{'amount': 50.0, 'category': 'gym'}],
+            'notifications': ['over "budget"', 'café {x}'], 'next_id': 3}
+    records = parse(data, chunk_size)
+    assert records == [('transaction', t) for t in TRANSACTIONS] + [
+        ('budgets', data['budgets']), ('recurring', data['recurring']),
+        ('notifications', data['notifications']), ('next_id', 3)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 1 << 16])
+def test_list_layout(chunk_size):
+    assert parse(TRANSACTIONS, chunk_size) == [('transaction', t) for t in TRANSACTIONS]
+
+
+@pytest.mark.parametrize('data', [{}, [], {'transactions': []}])
+def test_empty(data):
+    assert [r for r in parse(data, 4) if r[0] == 'transaction'] == []
+
+
+def test_large_values_with_small_chunks():
+    # A value far bigger than a chunk must still decode, and in linear time
+    notifications = [f"note {i}" for i in range(20000)]
+    data = {'transactions': TRANSACTIONS, 'notifications': notifications,
+            'memo': 'x' * 200000}
+    records = dict(parse(data, 64)[len(TRANSACTIONS):])
+    assert records['notifications'] == notifications
+    assert records['memo'] == data['memo']
+
+
+def test_truncated_file_raises():
+    text = json.dumps({'transactions': TRANSACTIONS})[:-10]
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_ledger(io.StringIO(text), chunk_size=8))
+
+
+def test_write_json_atomic(tmp_path):
+    path = tmp_path / 'ledger.json'
+    path.write_text('old')
+    write_json_atomic(str(path), {'transactions': TRANSACTIONS})
+    assert json.loads(path.read_text()) == {'transactions': TRANSACTIONS}
+    assert [p.name for p in tmp_path.iterdir()] == ['ledger.json']
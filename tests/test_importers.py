@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+import importers
+from importers import import_file, read_csv, read_ofx, read_qif
+from tracker import FinanceTracker
+
+COFFEE = {'amount': 12.5, 'category': 'Coffee', 'type': 'expense', 'date': '2024-01-05'}
+PAY = {'amount': 100.0, 'category': 'Pay', 'type': 'income', 'date': '2024-01-06'}
+
+OFX_ONE_LINE = (
+    "<OFX><BANKTRANLIST>"
+    "<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20240105</DTPOSTED>"
+    "<TRNAMT>-12.50</TRNAMT><NAME>Coffee</NAME></STMTTRN>"
+    "<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20240106120000</DTPOSTED>"
+    "<TRNAMT>100</TRNAMT><NAME>Pay</NAME></STMTTRN>"
+    "</BANKTRANLIST></OFX>"
+)
+
+OFX_SGML = """OFXHEADER:100
+<OFX>
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105
+<TRNAMT>-12.50
+<NAME>Coffee
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240106
+<TRNAMT>100
+<NAME>Pay
+</BANKTRANLIST>
+</OFX>
+"""
+
+
+@pytest.mark.parametrize('chunk', [5, 1 << 16])
+def test_ofx_two_transactions_on_one_line(monkeypatch, chunk):
+    monkeypatch.setattr(importers, 'OFX_CHUNK', chunk)
+    assert list(read_ofx(io.StringIO(OFX_ONE_LINE))) == [COFFEE, PAY]
+
+
+def test_ofx_sgml_without_closing_tags():
+    assert list(read_ofx(io.StringIO(OFX_SGML))) == [COFFEE, PAY]
+
+
+def test_csv_signs_and_debit_credit_columns():
+    signed = "Date,Amount,Description\n2024-01-05,-12.50,Coffee\n01/06/2024,100,Pay\n"
+    assert list(read_csv(io.StringIO(signed))) == [COFFEE, PAY]
+    split = "Date,Debit,Credit,Payee\n2024-01-05,12.50,,Coffee\n2024-01-06,,100,Pay\n"
+    assert list(read_csv(io.StringIO(split))) == [COFFEE, PAY]
+
+
+def test_qif():
+    text = "!Type:Bank\nD01/05/2024\nT-12.50\nPCoffee\n^\nD01/06/2024\nT100\nPPay\n^\n"
+    assert list(read_qif(io.StringIO(text))) == [COFFEE, PAY]
+
+
+def test_import_rejects_bad_dates_and_amounts(tmp_path):
+    statement = tmp_path / "statement.csv"
+    statement.write_text("date,amount,description\n"
+                         "2024-01-05,-12.50,Coffee\n"
+                         ",-3,No date\n"
+                         "31/31/2024,-4,Bad date\n"
+                         "2024-01-06,abc,Bad amount\n"
+                         "2024-01-06,100,Pay\n")
+    tracker = FinanceTracker(str(tmp_path / "ledger.json"))
+    result = import_file(tracker, str(statement), chunk_size=2)
+
+    assert result['added'] == 2 and result['rejected'] == 3
+    errors = {e['row']: e['error'] for e in result['errors']}
+    assert errors[2] == "missing date"
+    assert errors[3] == "unparseable date '31/31/2024'"
+    assert 4 in errors
+    assert sorted(t['category'] for t in tracker.transactions) == ['coffee', 'pay']
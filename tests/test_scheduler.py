@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+
+from scheduler import RecurringScheduler, validate_rule
+
+
+def rule(**fields):
+    return {'amount': 10.0, 'category': 'rent', 'type': 'expense', 'interval': 1,
+            'last_applied': None, **fields}
+
+
+def test_catches_up_missed_occurrences():
+    monthly = rule(frequency='months', day=31, start='2024-01-01')
+    scheduler = RecurringScheduler([monthly], date(2024, 1, 1))
+    due = scheduler.due(date(2024, 4, 15))
+    assert [when.isoformat() for _, when in due] == ['2024-01-31', '2024-02-29', '2024-03-31']
+    assert monthly['last_applied'] == '2024-03-31'
+    assert scheduler.next_date() == date(2024, 4, 30)
+
+
+def test_failing_rule_is_kept_and_contributes_nothing(capsys):
+    good = rule(interval=7, start='2024-01-01')
+    bad = rule(category='gym', frequency='months', day=1, start='2024-01-01')
+    scheduler = RecurringScheduler([good, bad], date(2024, 1, 1))
+    # Breaks after the first occurrence has been produced
+    bad['interval'] = 'monthly'
+
+    due = scheduler.due(date(2024, 1, 20))
+    assert [(r['category'], when.day) for r, when in due] == [('rent', 1), ('rent', 8), ('rent', 15)]
+    assert bad['last_applied'] is None
+    assert 'gym' in capsys.readouterr().out
+    assert (date(2024, 1, 1), 1) in scheduler.heap
+
+    bad['interval'] = 1
+    due = scheduler.due(date(2024, 1, 21))
+    assert [(r['category'], when.day) for r, when in due] == [('gym', 1)]
+    assert bad['last_applied'] == '2024-01-01'
+
+
+@pytest.mark.parametrize('fields', [
+    {'type': 'transfer'},
+    {'frequency': 'yearly'},
+    {'interval': 0},
+    {'frequency': 'weeks', 'weekday': 7},
+    {'frequency': 'months', 'day': 32},
+    {'frequency': 'dates', 'dates': []},
+    {'frequency': 'dates', 'dates': ['2024-02-30']},
+])
+def test_validate_rule_rejects(fields):
+    with pytest.raises(ValueError):
+        validate_rule(rule(**fields))
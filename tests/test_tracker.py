@@ -0,0 +1,94 @@
+import math
+
+import pytest
+
+from tracker import FinanceTracker
+
+ROWS = [
+    {'amount': 0.1, 'category': 'food', 'type': 'expense', 'date': '2024-01-03'},
+    {'amount': 0.2, 'category': 'food', 'type': 'expense', 'date': '2024-01-03'},
+    {'amount': 500.0, 'category': 'pay', 'type': 'income', 'date': '2024-01-01'},
+    {'amount': 70.0, 'category': 'fuel', 'type': 'expense', 'date': '2024-02-10'},
+]
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    return FinanceTracker(str(tmp_path / 'ledger.json'))
+
+
+def indexes(tracker):
+    return tracker._totals, tracker._type_totals, tracker._daily, tracker._amount_stats
+
+
+def rebuilt(tracker):
+    """The indexes a fresh load of the same rows would build"""
+    tracker._totals, tracker._type_totals = {}, {}
+    tracker._daily, tracker._amount_stats = {}, {}
+    for row in tracker.transactions.to_dicts():
+        tracker._index_add(row)
+    return indexes(tracker)
+
+
+def assert_close(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            assert_close(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected)
+        for a, e in zip(actual, expected):
+            assert_close(a, e)
+    else:
+        assert math.isclose(actual, expected, abs_tol=1e-9)
+
+
+def test_removals_leave_no_empty_entries(tracker):
+    added, _ = tracker.add_transactions(ROWS)
+    tracker.delete_transaction(added[0]['id'])
+    tracker.delete_transaction(added[1]['id'])
+    tracker.update_transaction(added[3]['id'], category='travel', date='2024-03-01')
+
+    assert tracker._totals['2024-01'] == {'income': {'pay': 500.0}}
+    assert '2024-02' not in tracker._totals
+    assert [row['month'] for row in tracker.monthly_summary()] == ['2024-01', '2024-03']
+    after_edits = [dict(d) for d in indexes(tracker)]
+    assert_close(after_edits, list(rebuilt(tracker)))
+
+
+def test_removing_everything_empties_the_indexes(tracker):
+    added, _ = tracker.add_transactions(ROWS)
+    for row in added:
+        tracker.delete_transaction(row['id'])
+    assert indexes(tracker) == ({}, {}, {}, {})
+    assert tracker.monthly_summary() == []
+
+
+def test_balance_matches_rebuild(tracker):
+    tracker.add_transactions(ROWS)
+    assert tracker.balance_on('2024-01-31') == pytest.approx(499.7)
+    tracker.add_transaction(30.0, 'food', 'expense', '2024-02-20')
+    tracker.add_transaction(10.0, 'food', 'expense', '2024-01-15')
+    incremental = tracker.balance_on('2024-12-31')
+    tracker._balance_days = None
+    assert tracker.balance_on('2024-12-31') == pytest.approx(incremental)
+    assert incremental == pytest.approx(389.7)
+
+
+@pytest.mark.parametrize('amount', ['nan', 'inf', '-inf', float('nan'), float('inf')])
+def test_non_finite_amounts_are_rejected(tracker, amount):
+    assert tracker.add_transaction(amount, 'food', 'expense', '2024-01-01') is None
+    added, rejected = tracker.add_transactions(
+        [{'amount': amount, 'category': 'food', 'type': 'expense', 'date': '2024-01-01'}])
+    assert not added and rejected[0]['error'].startswith('invalid amount')
+    assert tracker.set_budget('food', amount) is False
+    with pytest.raises(ValueError):
+        tracker.add_recurring(amount, 'rent')
+    assert len(tracker.transactions) == 0
+
+
+def test_query_pages_follow_select_order(tracker):
+    tracker.add_transactions([dict(ROWS[0], amount=float(i)) for i in range(1, 8)])
+    everything = tracker.query(reverse=True)
+    pages = [tracker.query(reverse=True, offset=offset, limit=3) for offset in (0, 3, 6)]
+    assert [dict(r) for page in pages for r in page] == [dict(r) for r in everything]
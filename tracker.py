@@ -1,90 +1,662 @@
+import atexit
 import json
+import math
+import weakref
+from bisect import bisect_right
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from itertools import accumulate
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from scheduler import RecurringScheduler, next_due, validate_rule
+from storage import Storage, open_storage
+from store import TransactionRow, TransactionStore, date_to_ordinal, ordinal_to_date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Totals within this of zero after a removal count as gone
+ZERO = 1e-9
+# How each transaction type moves the balance; other types leave it alone
+FLOW = {'income': 1, 'expense': -1}
+
+
+def _net(trans_type: str, amount: float) -> float:
+    return FLOW.get(trans_type, 0) * amount
+
+
+def _flush_at_exit(ref):
+    tracker = ref()
+    if tracker is not None:
+        tracker.flush()
+
 
 class FinanceTracker:
-    def __init__(self, filename: str = "transactions.json"):
+    def __init__(self, filename: str = "transactions.json", journal: bool = False,
+                 storage: Optional[Storage] = None, recent_months: Optional[int] = None,
+                 save_delay: Optional[float] = None, call_later: Optional[Callable] = None,
+                 sharded: bool = False):
         self.filename = filename
-        self.transactions = []
+        self.storage = storage or open_storage(filename, journal=journal, sharded=sharded)
+        # With a save_delay, full rewrites are deferred and coalesced: the
+        # first change schedules flush() through call_later(seconds, func)
+        # (e.g. Tk's after); flush(), close() and interpreter exit write too
+        self.save_delay = save_delay
+        self.call_later = call_later
+        self._dirty = False
+        if save_delay is not None:
+            atexit.register(_flush_at_exit, weakref.ref(self))
+        # Only load this many months of rows up front; older ones on first access
+        self.recent_months = recent_months
+        self._store = TransactionStore()
+        self._cutoff: Optional[str] = None
         self.budgets = {}
         self.recurring = []
         self.notifications = []
+        # month -> type -> category -> total
+        self._totals: Dict[str, Dict[str, Dict[str, float]]] = {}
+        # Running all-time totals per type, and (date, amount) of due recurring expenses
+        self._type_totals: Dict[str, float] = {}
+        self._upcoming: Optional[Tuple] = None
+        # Built on first use and whenever the rule list is replaced
+        self._scheduler: Optional[RecurringScheduler] = None
+        # type -> date -> total, and the data version each date last changed at
+        self._daily: Dict[str, Dict[str, float]] = {}
+        self._day_versions: Dict[str, int] = {}
+        # type -> category -> [count, sum, sum of squares] of amounts
+        self._amount_stats: Dict[str, Dict[str, List[float]]] = {}
+        # Day ordinals with activity and the balance at the end of each
+        # (prefix sums of net cash flow); None until needed again
+        self._balance_days: Optional[List[int]] = None
+        self._balance_sums: List[float] = []
+        # Bumped on every change to the totals; charts redraw only when it moves
+        self.version = 0
+        self._reset_version = 0
         self._load_data()
-        self._process_recurring()
+        self.process_recurring()
+
+    @property
+    def transactions(self) -> TransactionStore:
+        self._load_history()
+        return self._store
+
+    def _recent_cutoff(self) -> str:
+        today = datetime.now()
+        months = today.year * 12 + today.month - self.recent_months
+        return f"{months // 12:04d}-{months % 12 + 1:02d}-01"
 
     def _load_data(self):
+        self._store = TransactionStore()
+        self.budgets = {}
+        self.recurring = []
+        self.notifications = []
+        self._totals = {}
+        self._type_totals = {}
+        self._upcoming = None
+        self._scheduler = None
+        self._daily = {}
+        self._day_versions = {}
+        self._amount_stats = {}
+        self._balance_days = None
+        self.version += 1
+        self._reset_version = self.version
+        self._cutoff = self._recent_cutoff() if self.recent_months else None
+
         try:
-            with open(self.filename, 'r') as f:
-                data = json.load(f)
-                
-                # Handle both old (list) and new (dict) formats
-                if isinstance(data, list):
-                    self.transactions = data
-                else:
-                    self.transactions = data.get('transactions', [])
-                    self.budgets = data.get('budgets', {})
-                    self.recurring = data.get('recurring', [])
-                    self.notifications = data.get('notifications', [])
-                    
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.transactions = []
+            for op, data in self.storage.load(since=self._cutoff):
+                self._apply(op, data)
+        except json.JSONDecodeError:
+            self._store = TransactionStore()
             self.budgets = {}
             self.recurring = []
             self.notifications = []
+            self._totals = {}
+            self._type_totals = {}
+            self._daily = {}
+            self._amount_stats = {}
+
+        # Ids of rows that were not loaded must not be handed out again
+        self._store.next_id = max(self._store.next_id, self.storage.max_id() + 1)
+        if self.storage.supports_queries:
+            groups = self.storage.month_totals()
+        else:
+            # Rows older than the cutoff were counted as they streamed past
+            groups = [key + (total,) for key, total in self._store.group_totals().items()]
+        for month, trans_type, category, total in groups:
+            by_category = self._totals.setdefault(month, {}).setdefault(trans_type, {})
+            by_category[category] = by_category.get(category, 0.0) + total
+            self._type_totals[trans_type] = self._type_totals.get(trans_type, 0.0) + total
+        if self.storage.supports_queries:
+            days = self.storage.day_totals()
+        else:
+            days = [key + (total,) for key, total in self._store.day_totals().items()]
+        for day, trans_type, total in days:
+            by_day = self._daily.setdefault(trans_type, {})
+            by_day[day] = by_day.get(day, 0.0) + total
+        if self.storage.supports_queries:
+            stats = self.storage.amount_stats()
+        else:
+            stats = [key + value for key, value in self._store.amount_stats().items()]
+        for trans_type, category, count, total, square in stats:
+            by_category = self._amount_stats.setdefault(trans_type, {})
+            entry = by_category.setdefault(category, [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += total
+            entry[2] += square
+
+    def _apply(self, op: str, data):
+        """Apply one stored record while loading"""
+        if op == 'update':
+            self._apply('delete', data['old'])
+            self._apply('add', data['new'])
+        elif op in ('add', 'delete') and self._cutoff and data['date'] < self._cutoff:
+            if op == 'add':
+                self._store.next_id = max(self._store.next_id, data.get('id', 0) + 1)
+            if not self.storage.supports_queries:
+                self._index_add(data, sign=1 if op == 'add' else -1)
+        elif op == 'add':
+            self._store.append(data)
+        elif op == 'delete':
+            if self._store.position(data['id']) is not None:
+                self._store.remove(data['id'])
+        elif op == 'budget':
+            self.budgets[data['category']] = data['limit']
+        elif op == 'notify':
+            self.notifications.append(data)
+        elif op == 'next_id':
+            self._store.next_id = max(self._store.next_id, data)
+        elif op in ('budgets', 'recurring', 'notifications'):
+            setattr(self, op, data)
+        elif op == 'store':
+            # Every row at once, history included, so nothing is left to page in
+            data.next_id = max(data.next_id, self._store.next_id)
+            self._store = data
+            self._cutoff = None
+        else:
+            raise ValueError(f"Unknown storage record: {op}")
+
+    def _load_history(self, since: Optional[str] = None):
+        """Page in rows older than the cutoff, only back to ``since`` if given"""
+        if self._cutoff is None or (since is not None and since >= self._cutoff):
+            return
+        cutoff, self._cutoff = self._cutoff, since
+        store = self._store
+        # Rows moved into the range after loading are already held
+        self._store.extend(row for row in self.storage.load_before(cutoff, since)
+                           if store.position(row['id']) is None)
+
+    def _index_add(self, transaction: Dict, sign: int = 1):
+        month = transaction['date'][:7]
+        trans_type = transaction['type']
+        category = transaction['category']
+        day = transaction['date']
+        amount = sign * transaction['amount']
+        by_type = self._totals.setdefault(month, {})
+        by_category = by_type.setdefault(trans_type, {})
+        by_category[category] = by_category.get(category, 0.0) + amount
+        self._type_totals[trans_type] = self._type_totals.get(trans_type, 0.0) + amount
+        by_day = self._daily.setdefault(trans_type, {})
+        by_day[day] = by_day.get(day, 0.0) + amount
+        by_stats = self._amount_stats.setdefault(trans_type, {})
+        entry = by_stats.setdefault(category, [0, 0.0, 0.0])
+        entry[0] += sign
+        entry[1] += amount
+        entry[2] += amount * transaction['amount']
+        if sign < 0:
+            # Drop what removals leave at zero, as a fresh load would not have it
+            if abs(by_category[category]) < ZERO:
+                del by_category[category]
+                if not by_category:
+                    del by_type[trans_type]
+                    if not by_type:
+                        del self._totals[month]
+            if abs(by_day[day]) < ZERO:
+                del by_day[day]
+                if not by_day:
+                    del self._daily[trans_type]
+            if entry[0] <= 0:
+                del by_stats[category]
+                if not by_stats:
+                    del self._amount_stats[trans_type]
+            if abs(self._type_totals[trans_type]) < ZERO and not by_stats:
+                del self._type_totals[trans_type]
+        self._extend_balance(day, _net(trans_type, amount))
+        self.version += 1
+        self._day_versions[day] = self.version
+
+    def _extend_balance(self, day: str, net: float):
+        days = self._balance_days
+        if days is None:
+            return
+        ordinal = date_to_ordinal(day)
+        if days and ordinal < days[-1]:
+            # Back-dated change: every later balance moves, rebuild on next read
+            self._balance_days = None
+        elif days and ordinal == days[-1]:
+            self._balance_sums[-1] += net
+        else:
+            previous = self._balance_sums[-1] if days else 0.0
+            days.append(ordinal)
+            self._balance_sums.append(previous + net)
+
+    def _state(self, copy: bool = False) -> Dict:
+        if self.storage.columnar:
+            transactions = self.transactions.copy() if copy else self.transactions
+        else:
+            transactions = self.transactions.to_dicts()
+        if copy:
+            return {
+                'transactions': transactions,
+                'budgets': dict(self.budgets),
+                'recurring': [dict(rt) for rt in self.recurring],
+                'notifications': list(self.notifications),
+                'next_id': self._store.next_id
+            }
+        return {
+            'transactions': transactions,
+            'budgets': self.budgets,
+            'recurring': self.recurring,
+            'notifications': self.notifications,
+            'next_id': self._store.next_id
+        }
 
     def _save_data(self):
-        with open(self.filename, 'w') as f:
-            json.dump({
-                'transactions': self.transactions,
-                'budgets': self.budgets,
-                'recurring': self.recurring,
-                'notifications': self.notifications
-            }, f, indent=4)
+        """Write the full state now"""
+        self._dirty = False
+        self.storage.save(self._state())
+
+    def _mark_dirty(self):
+        """A full rewrite is needed: now, or coalesced after save_delay"""
+        if self.save_delay is None:
+            self._save_data()
+            return
+        if self._dirty:
+            return
+        self._dirty = True
+        if self.call_later is not None:
+            self.call_later(self.save_delay, self.flush)
+
+    def flush(self):
+        """Write out a deferred rewrite, if one is pending"""
+        if self._dirty:
+            self._save_data()
+
+    def _persist(self, op: str, data):
+        # Journaled storage appends the change; otherwise rewrite the file
+        if not self.storage.log(op, data):
+            self._mark_dirty()
+        elif self.storage.needs_compaction():
+            self.compact(background=True)
+
+    def compact(self, background: bool = False):
+        self.flush()
+        if background:
+            self.storage.compact_async(self._state(copy=True))
+        else:
+            self.storage.compact(self._state())
+
+    def close(self):
+        self.flush()
+        self.storage.close()
+
+    def _build_transaction(self, amount, category, trans_type, date=None) -> Dict:
+        """Normalize one row, raising ValueError with the reason it is invalid"""
+        amount = float(amount)
+        if not math.isfinite(amount):
+            raise ValueError(f"invalid amount: {amount!r}")
+        if not isinstance(category, str) or not category.strip():
+            raise ValueError("missing category")
+        if not isinstance(trans_type, str) or trans_type.lower() not in ('income', 'expense'):
+            raise ValueError(f"invalid type: {trans_type!r}")
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
+        else:
+            date = datetime.fromisoformat(date).strftime("%Y-%m-%d")
+
+        return {
+            'amount': amount,
+            'category': category.lower(),
+            'type': trans_type.lower(),
+            'date': date
+        }
 
     def add_transaction(self, amount: float, category: str, 
                        trans_type: str, date: str = None) -> Optional[Dict]:
         try:
-            if not date:
-                date = datetime.now().strftime("%Y-%m-%d")
-            
-            transaction = {
-                'amount': float(amount),
-                'category': category.lower(),
-                'type': trans_type.lower(),
-                'date': date
-            }
-            
-            self.transactions.append(transaction)
-            self._check_budgets(transaction)
-            self._save_data()
-            return transaction
-            
-        except ValueError:
+            transaction = self._build_transaction(amount, category, trans_type, date)
+        except (TypeError, ValueError):
             return None
 
-    def _process_recurring(self):
-        today = datetime.now().date()
-        processed = []
-        
-        for rt in self.recurring:
-            last_date = datetime.strptime(rt['last_applied'], "%Y-%m-%d").date() if rt['last_applied'] else None
-            interval = timedelta(days=rt['interval'])
-            next_date = last_date + interval if last_date else today
-            
-            if not last_date or today >= next_date:
-                self.add_transaction(
-                    rt['amount'],
-                    rt['category'],
-                    rt['type'],
-                    today.strftime("%Y-%m-%d")
-                )
-                rt['last_applied'] = today.strftime("%Y-%m-%d")
-                processed.append(rt)
-        
-        if processed:
-            self._save_data()
-        return processed
+        transaction['id'] = self._store.append(transaction)
+        self._index_add(transaction)
+        self._persist('add', transaction)
+        self._check_budgets(transaction)
+        return transaction
+
+    def get_transaction(self, transaction_id: int) -> Optional[TransactionRow]:
+        row = self._store.get(transaction_id)
+        if row is None and self._cutoff:
+            row = self.transactions.get(transaction_id)
+        return row
+
+    def delete_transaction(self, transaction) -> bool:
+        """Delete by id, by row (anything with an 'id'), or by matching values"""
+        if isinstance(transaction, int):
+            transaction_id = transaction
+        elif transaction.get('id') is not None:
+            transaction_id = transaction['id']
+        else:
+            try:
+                transaction_id = self.transactions.ids[self.transactions.index(transaction)]
+            except ValueError:
+                return False
+
+        if self.get_transaction(transaction_id) is None:
+            return False
+        record = self._store.remove(transaction_id)
+        self._index_add(record, sign=-1)
+        self._persist('delete', record)
+        return True
+
+    def update_transaction(self, transaction_id: int, **changes) -> Optional[Dict]:
+        """Edit fields of one transaction in place; None if missing or invalid"""
+        row = self.get_transaction(transaction_id)
+        if row is None:
+            return None
+
+        old = dict(row)
+        fields = {**old, **changes}
+        try:
+            new = self._build_transaction(fields['amount'], fields['category'],
+                                          fields['type'], fields['date'])
+        except (TypeError, ValueError):
+            return None
+        new['id'] = transaction_id
+
+        self._store.update(transaction_id, new)
+        self._index_add(old, sign=-1)
+        self._index_add(new)
+        self._persist('update', {'old': old, 'new': new})
+        self._check_budgets(new)
+        return new
+
+    def add_transactions(self, rows: Iterable[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Validate and add many rows with a single write and budget pass.
+
+        Returns ``(added, rejected)`` where each rejected entry holds the
+        row's position in the input, the row itself and the error message.
+        """
+        added = []
+        rejected = []
+        for index, row in enumerate(rows):
+            try:
+                added.append(self._build_transaction(
+                    row['amount'], row['category'], row['type'], row.get('date')))
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                reason = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+                rejected.append({'index': index, 'row': row, 'error': reason})
+
+        if added:
+            self._add_built(added)
+        return added, rejected
+
+    def _add_built(self, added: List[Dict], records: Iterable[Tuple[str, object]] = ()):
+        """Insert validated rows with a single write and budget pass.
+
+        ``records`` are extra (op, data) changes persisted in the same pass.
+        """
+        for t in added:
+            t['id'] = self._store.append(t)
+            self._index_add(t)
+        persisted = self.storage.log_many('add', added)
+
+        notifications = []
+        affected = defaultdict(float)
+        for t in added:
+            if t['type'] == 'expense' and t['category'] in self.budgets:
+                affected[(t['category'], t['date'][:7])] += t['amount']
+        for (category, month), amount in affected.items():
+            alert = self._budget_alert(category, month, amount)
+            if alert:
+                notifications.append(alert)
+        self.notifications.extend(notifications)
+
+        if not (persisted and self.storage.log_many('notify', notifications)
+                and all(self.storage.log(op, data) for op, data in records)):
+            self._mark_dirty()
+        elif self.storage.needs_compaction():
+            self.compact(background=True)
+
+    def _sum(self, trans_type: str, category: str = None, month: str = None) -> float:
+        if category is None and month is None:
+            return self._type_totals.get(trans_type, 0.0)
+        months = [self._totals.get(month, {})] if month else self._totals.values()
+        total = 0.0
+        for by_type in months:
+            by_category = by_type.get(trans_type, {})
+            if category is None:
+                total += sum(by_category.values())
+            else:
+                total += by_category.get(category, 0.0)
+        return total
+
+    def _query_store(self, since: Optional[str]) -> TransactionStore:
+        # Rows from the cutoff on are loaded already, older ones only as far back as asked
+        self._load_history(since)
+        return self._store
+
+    def query(self, since: str = None, until: str = None, categories=None,
+              trans_type: str = None, min_amount: float = None, max_amount: float = None,
+              sort_by: str = "date", reverse: bool = False, offset: int = 0,
+              limit: Optional[int] = None) -> List[TransactionRow]:
+        """Transactions matching every given filter, one window of them.
+
+        ``since``/``until`` are inclusive ISO dates and ``categories`` a name
+        or a collection of names. Date and category filters use the store's
+        index, so ranges cost O(log n + k).
+        """
+        store = self._query_store(since)
+        positions = store.select(since, until, categories, trans_type, min_amount, max_amount,
+                                 sort_by, reverse, offset, limit)
+        return [TransactionRow(store, i) for i in positions]
+
+    def count(self, since: str = None, until: str = None, categories=None,
+              trans_type: str = None, min_amount: float = None,
+              max_amount: float = None) -> int:
+        return self._query_store(since).count(since, until, categories, trans_type,
+                                              min_amount, max_amount)
+
+    def aggregate(self, group_by=("category",), since: str = None, until: str = None,
+                  categories=None, trans_type: str = None, min_amount: float = None,
+                  max_amount: float = None) -> Dict:
+        """Totals of the matching transactions grouped by date, month, year,
+        category and/or type; single values as keys for one field, else tuples."""
+        store = self._query_store(since)
+        positions = store.select(since, until, categories, trans_type, min_amount, max_amount)
+        return store.aggregate(positions, group_by)
+
+    def recent_transactions(self, count: int = 5) -> List[TransactionRow]:
+        """Newest rows by date, without paging in old history when possible"""
+        store = self._store if len(self._store) >= count else self.transactions
+        # Read off the end of the date index rather than scanning every row
+        return [store[i] for i in store.select(reverse=True, limit=count)]
+
+    def get_month_totals(self, month: str = None, trans_type: str = "expense") -> Dict[str, float]:
+        """Per-category totals for one month (defaults to the current month)"""
+        month = month or datetime.now().strftime("%Y-%m")
+        return dict(self._totals.get(month, {}).get(trans_type, {}))
+
+    def get_category_totals(self, category: str, trans_type: str = "expense") -> Dict[str, float]:
+        """Per-month totals for one category"""
+        return {
+            month: by_type[trans_type][category]
+            for month, by_type in sorted(self._totals.items())
+            if category in by_type.get(trans_type, {})
+        }
+
+    def monthly_summary(self) -> List[Dict]:
+        """Income, expenses and net per month, oldest first"""
+        summary = []
+        for month, by_type in sorted(self._totals.items()):
+            income = sum(by_type.get('income', {}).values(), 0.0)
+            expense = sum(by_type.get('expense', {}).values(), 0.0)
+            summary.append({'month': month, 'income': income, 'expense': expense,
+                            'net': income - expense})
+        return summary
+
+    def get_daily_totals(self, trans_type: str = "expense",
+                         days: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """Per-day totals, for every day or just ``days``"""
+        by_day = self._daily.get(trans_type, {})
+        if days is None:
+            return dict(by_day)
+        return {day: by_day.get(day, 0.0) for day in days}
+
+    def get_amount_stats(self, trans_type: str = "expense") -> Dict[str, Dict[str, float]]:
+        """Count, mean and standard deviation of single amounts per category"""
+        stats = {}
+        for category, (count, total, square) in self._amount_stats.get(trans_type, {}).items():
+            if count <= 0:
+                continue
+            mean = total / count
+            stats[category] = {'count': count, 'mean': mean,
+                               'std': max(0.0, square / count - mean * mean) ** 0.5}
+        return stats
+
+    def changed_days(self, since: int) -> Optional[List[str]]:
+        """Days whose totals changed after data version ``since``.
+
+        Returns None when the data was reloaded in between, meaning
+        everything has to be recomputed.
+        """
+        if since < self._reset_version:
+            return None
+        return [day for day, version in self._day_versions.items() if version > since]
+
+    def _balance_index(self) -> Tuple[List[int], List[float]]:
+        if self._balance_days is None:
+            net: Dict[str, float] = {}
+            for trans_type in FLOW:
+                for day, amount in self._daily.get(trans_type, {}).items():
+                    net[day] = net.get(day, 0.0) + _net(trans_type, amount)
+            days = sorted(net)
+            self._balance_sums = list(accumulate(net[day] for day in days))
+            self._balance_days = [date_to_ordinal(day) for day in days]
+        return self._balance_days, self._balance_sums
+
+    def balance_on(self, day: str) -> float:
+        """Income minus expenses up to and including ``day``, in O(log n)"""
+        days, sums = self._balance_index()
+        i = bisect_right(days, date_to_ordinal(day))
+        return sums[i - 1] if i else 0.0
+
+    def balance_history(self, since: str = None, until: str = None) -> Dict[str, float]:
+        """End-of-day balance for every calendar day from ``since`` to ``until``
+        (by default the first to the last day with transactions)"""
+        days, sums = self._balance_index()
+        if not days:
+            return {}
+        start = date_to_ordinal(since) if since else days[0]
+        end = date_to_ordinal(until) if until else days[-1]
+        if end < start:
+            return {}
+        if np is not None:
+            ordinals = np.arange(start, end + 1)
+            index = np.searchsorted(np.asarray(days), ordinals, side='right') - 1
+            balances = np.where(index >= 0, np.asarray(sums)[np.maximum(index, 0)], 0.0)
+            return dict(zip(map(ordinal_to_date, ordinals.tolist()), balances.tolist()))
+
+        history = {}
+        i = bisect_right(days, start) - 1
+        for ordinal in range(start, end + 1):
+            while i + 1 < len(days) and days[i + 1] <= ordinal:
+                i += 1
+            history[ordinal_to_date(ordinal)] = sums[i] if i >= 0 else 0.0
+        return history
+
+    def snapshot(self, recent: int = 5, window_days: int = 0) -> "TrackerSnapshot":
+        return TrackerSnapshot(self, recent, window_days)
+
+    def get_monthly_total(self, trans_type: str = "expense", month: str = None) -> float:
+        return self._sum(trans_type, month=month or datetime.now().strftime("%Y-%m"))
+
+    def set_budget(self, category: str, amount) -> bool:
+        try:
+            limit = float(amount)
+        except (TypeError, ValueError):
+            return False
+        if not math.isfinite(limit) or limit <= 0:
+            return False
+
+        category = category.lower()
+        self.budgets[category] = limit
+        self._persist('budget', {'category': category, 'limit': limit})
+        return True
+
+    def add_recurring(self, amount: float, category: str, trans_type: str = "expense",
+                      interval: int = 30, frequency: str = "days", **calendar) -> Dict:
+        """Add a recurring rule.
+
+        ``frequency`` is 'days' or 'weeks' (every ``interval`` of them),
+        'months' (every ``interval`` months on ``day``) or 'dates' (an
+        explicit list of ISO ``dates``). ``start`` sets the first date; without
+        it the rule is applied today. Weekly rules take a ``weekday`` (0=Mon).
+        """
+        amount = float(amount)
+        if not math.isfinite(amount):
+            raise ValueError(f"invalid amount: {amount!r}")
+        rule = {
+            'amount': amount,
+            'category': category,
+            'type': trans_type.lower(),
+            'interval': interval,
+            'last_applied': None
+        }
+        if frequency != 'days':
+            rule['frequency'] = frequency
+        if frequency == 'dates':
+            calendar['dates'] = sorted(calendar.get('dates', []))
+        rule.update(calendar)
+        validate_rule(rule)
+
+        self.recurring.append(rule)
+        if self._scheduler is not None:
+            self._scheduler.push(len(self.recurring) - 1, datetime.now().date())
+        self._upcoming = None
+        self._persist('recurring', self.recurring)
+        return rule
+
+    def process_recurring(self, today=None) -> List[Dict]:
+        """Apply every occurrence due up to ``today``, catching up missed ones.
+
+        All generated rows go in as one batch with one write. Returns the
+        rules that were applied.
+        """
+        today = today or datetime.now().date()
+        if self._scheduler is None or self._scheduler.rules is not self.recurring:
+            self._scheduler = RecurringScheduler(self.recurring, today)
+        due = self._scheduler.due(today)
+        if not due:
+            return []
+
+        rows = []
+        applied = []
+        for rule, when in due:
+            try:
+                rows.append(self._build_transaction(rule['amount'], rule['category'],
+                                                    rule['type'], when.isoformat()))
+            except (KeyError, TypeError, ValueError) as e:
+                # One bad stored rule must not keep the ledger from opening
+                print(f"Skipping recurring rule {rule.get('category')!r}: {e}")
+                continue
+            applied.append(rule)
+        self._upcoming = None
+        self._add_built(rows, [('recurring', self.recurring)])
+
+        return list({id(rule): rule for rule in applied}.values())
 
     def _check_budgets(self, transaction):
         if transaction['type'] != 'expense':
@@ -94,53 +666,57 @@ class FinanceTracker:
         if category not in self.budgets:
             return
         
-        current_month = datetime.now().strftime("%Y-%m")
-        monthly_spent = sum(
-            t['amount'] for t in self.transactions
-            if t['type'] == 'expense'
-            and t['category'] == category
-            and t['date'].startswith(current_month)
-        )
+        alert = self._budget_alert(category, transaction['date'][:7], transaction['amount'])
+        if alert:
+            self.notifications.append(alert)
+            self._persist('notify', alert)
+
+    def _budget_alert(self, category: str, month: str, amount: float) -> Optional[Dict]:
+        monthly_spent = self._sum('expense', category, month)
         
         budget_limit = self.budgets[category]
         if monthly_spent > budget_limit:
-            self.notifications.append({
+            return {
                 'type': 'budget_alert',
                 'category': category,
-                'amount': transaction['amount'],
+                'amount': amount,
                 'limit': budget_limit,
                 'spent': monthly_spent,
                 'date': datetime.now().strftime("%Y-%m-%d %H:%M"),
                 'message': f"Budget exceeded for {category.title()}! (${monthly_spent:.2f} of ${budget_limit:.2f})"
-            })
-            self._save_data()
+            }
+        return None
+
+    def _upcoming_recurring(self) -> float:
+        # Only changes when a rule is added/applied or the day rolls over
+        today = datetime.now().date()
+        if self._upcoming is None or self._upcoming[0] != today:
+            total = 0.0
+            for rt in self.recurring:
+                if rt['type'] != 'expense':
+                    continue
+                when = next_due(rt, today)
+                if when is None or when > today:
+                    continue
+                total += rt['amount']
+            self._upcoming = (today, total)
+        return self._upcoming[1]
+
+    def get_balance(self) -> Dict[str, float]:
+        income = self._sum('income')
+        expense = self._sum('expense')
+        upcoming = self._upcoming_recurring()
+        return {'income': income, 'expense': expense, 'upcoming_recurring': upcoming,
+                'available': income - (expense + upcoming)}
 
     def get_available_funds(self) -> float:
-        total_income = sum(t['amount'] for t in self.transactions if t['type'] == 'income')
-        total_expenses = sum(t['amount'] for t in self.transactions if t['type'] == 'expense')
-        
-        upcoming_recurring = sum(
-            rt['amount'] for rt in self.recurring
-            if rt['type'] == 'expense'
-            and (not rt['last_applied'] or 
-                datetime.now().date() >= (
-                    datetime.strptime(rt['last_applied'], "%Y-%m-%d").date() + 
-                    timedelta(days=rt['interval'])
-                )
-            )
-        )
-        
-        return total_income - (total_expenses + upcoming_recurring)
+        total_income = self._sum('income')
+        total_expenses = self._sum('expense')
+        return total_income - (total_expenses + self._upcoming_recurring())
 
     def get_budget_status(self) -> Dict:
         current_month = datetime.now().strftime("%Y-%m")
-        expenses = [t for t in self.transactions 
-                   if t['type'] == 'expense'
-                   and t['date'].startswith(current_month)]
-        
-        category_spending = defaultdict(float)
-        for t in expenses:
-            category_spending[t['category']] += t['amount']
+        category_spending = self.get_month_totals(current_month, 'expense')
         
         return {
             category: {
@@ -149,4 +725,50 @@ class FinanceTracker:
                 'remaining': max(0, limit - category_spending.get(category, 0))
             }
             for category, limit in self.budgets.items()
-        }
\ No newline at end of file
+        }
+
+
+class TrackerSnapshot:
+    """Copy of the aggregates behind the dashboard, safe to read off-thread.
+
+    Only the indexes are copied (months x categories and days), never the
+    rows; the read methods are the tracker's own.
+    """
+
+    def __init__(self, tracker: FinanceTracker, recent: int = 5, window_days: int = 0):
+        self.version = tracker.version
+        self._reset_version = tracker._reset_version
+        self.budgets = dict(tracker.budgets)
+        self.recurring = [dict(rt) for rt in tracker.recurring]
+        self._totals = {month: {trans_type: dict(by_category)
+                                for trans_type, by_category in by_type.items()}
+                        for month, by_type in tracker._totals.items()}
+        self._type_totals = dict(tracker._type_totals)
+        self._upcoming = tracker._upcoming
+        self._daily = {trans_type: dict(by_day) for trans_type, by_day in tracker._daily.items()}
+        self._day_versions = dict(tracker._day_versions)
+        self._amount_stats = {trans_type: {category: list(entry)
+                                           for category, entry in by_category.items()}
+                              for trans_type, by_category in tracker._amount_stats.items()}
+        days, sums = tracker._balance_index()
+        self._balance_days = list(days)
+        self._balance_sums = list(sums)
+        self.recent = [dict(t) for t in tracker.recent_transactions(recent)]
+        # Expenses of the last ``window_days`` days, e.g. to flag unusual ones
+        self.window = []
+        if window_days:
+            since = (datetime.now() - timedelta(days=window_days - 1)).strftime("%Y-%m-%d")
+            self.window = [dict(t) for t in tracker.query(since=since, trans_type='expense')]
+
+    _sum = FinanceTracker._sum
+    _upcoming_recurring = FinanceTracker._upcoming_recurring
+    get_available_funds = FinanceTracker.get_available_funds
+    get_budget_status = FinanceTracker.get_budget_status
+    get_month_totals = FinanceTracker.get_month_totals
+    get_monthly_total = FinanceTracker.get_monthly_total
+    get_daily_totals = FinanceTracker.get_daily_totals
+    changed_days = FinanceTracker.changed_days
+    get_amount_stats = FinanceTracker.get_amount_stats
+    _balance_index = FinanceTracker._balance_index
+    balance_on = FinanceTracker.balance_on
+    balance_history = FinanceTracker.balance_history
@@ -0,0 +1,108 @@
+from tkinter import ttk
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview that only holds the rows currently in view.
+
+    Rows are pulled on demand through ``fetch(offset, limit, sort_by,
+    reverse)`` and ``count()``; ``format_row`` turns a row into the tuple
+    of displayed values. Scrolling, resizing and heading clicks only re-fill
+    the visible items, so the widget cost is independent of ledger size.
+    """
+
+    def __init__(self, parent, columns, fetch, count, format_row,
+                 sort_by="date", reverse=True, row_height=25):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.fetch = fetch
+        self.count = count
+        self.format_row = format_row
+        self.sort_by = sort_by
+        self.reverse = reverse
+        self.row_height = row_height
+        self.offset = 0
+        self.visible_rows = 20
+        self.total = 0
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings",
+                                 height=self.visible_rows, selectmode="browse")
+        for col in self.columns:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort(c))
+            self.tree.column(col, width=100, anchor='center')
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1, "units"))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1, "units"))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self.scroll(1, "pages"))
+
+    def column(self, col, **options):
+        self.tree.column(col, **options)
+
+    def selected_id(self):
+        # Item ids are the transaction ids
+        selected = self.tree.selection()
+        return int(selected[0]) if selected else None
+
+    def sort(self, column):
+        """Sort by ``column``; clicking the active column flips the order"""
+        field = column.lower()
+        if field == self.sort_by:
+            self.reverse = not self.reverse
+        else:
+            self.sort_by, self.reverse = field, False
+        self.offset = 0
+        self.refresh()
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * self.total)
+            self.refresh()
+        elif args[0] == "scroll":
+            self.scroll(int(args[1]), args[2])
+
+    def scroll(self, amount, what="units"):
+        step = self.visible_rows if what == "pages" else 1
+        self.offset += amount * step
+        self.refresh()
+        return "break"
+
+    def _on_resize(self, event):
+        # Leave room for the heading row
+        rows = max(1, event.height // self.row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.tree.configure(height=rows)
+            self.refresh()
+
+    def refresh(self):
+        """Re-fill the visible window from the data source"""
+        self.total = self.count()
+        self.offset = max(0, min(self.offset, self.total - self.visible_rows))
+        page = self.fetch(self.offset, self.visible_rows, self.sort_by, self.reverse)
+
+        # Items are keyed by row id: only rows entering or leaving the
+        # window are inserted or deleted, the rest are moved/updated in place
+        rows = {str(row['id']): row for row in page}
+        stale = [iid for iid in self.tree.get_children() if iid not in rows]
+        if stale:
+            self.tree.delete(*stale)
+        for position, (iid, row) in enumerate(rows.items()):
+            values = self.format_row(row)
+            if self.tree.exists(iid):
+                self.tree.move(iid, "", position)
+                self.tree.item(iid, values=values)
+            else:
+                self.tree.insert("", position, iid=iid, values=values)
+
+        if self.total:
+            first = self.offset / self.total
+            last = min(1.0, (self.offset + self.visible_rows) / self.total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
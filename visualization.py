@@ -1,41 +1,205 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import io
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, List
+
+import numpy as np
 from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.figure import Figure
+
+# Create custom color gradient (green -> yellow -> red)
+MONEY_CMAP = LinearSegmentedColormap.from_list("money", ["#2ecc71", "#f1c40f", "#e74c3c"])
+MAX_TICKS = 15
+
+def _to_frame(transactions):
+    """Build a DataFrame from a TransactionStore or a list of dicts"""
+    # Only the one-off builders below need pandas; the charts the app uses don't
+    import pandas as pd
+
+    if hasattr(transactions, 'to_columns'):
+        return pd.DataFrame(transactions.to_columns())
+    return pd.DataFrame(transactions)
+
+def _daily_expenses(transactions) -> Dict[str, float]:
+    if hasattr(transactions, 'select'):
+        return transactions.aggregate(transactions.select(trans_type='expense'), 'date')
+    df = _to_frame(transactions)
+    if df.empty:
+        return {}
+    expenses = df[df['type'] == 'expense']
+    return expenses.groupby('date')['amount'].sum().to_dict()
+
+
+class DailyChart:
+    """One figure per widget, redrawn in place from per-day expense totals.
+
+    ``update(tracker)`` does nothing while ``tracker.version`` is unchanged;
+    otherwise only the days reported by ``tracker.changed_days`` are
+    re-read before the artists are updated.
+    """
+
+    figsize = (4, 1)
+
+    def __init__(self):
+        # Not created through pyplot, so nothing global keeps it alive
+        self.figure = Figure(figsize=self.figsize)
+        self.ax = self.figure.add_subplot()
+        self.version = None
+        self.days: List[str] = []
+        self.values: List[float] = []
+        self._png = None
+        self.setup()
+
+    @property
+    def empty(self) -> bool:
+        return not self.days
+
+    def setup(self):
+        pass
+
+    def draw(self):
+        raise NotImplementedError
+
+    def set_data(self, daily: Dict[str, float]):
+        """Replace all data with a {date: total} mapping"""
+        self.days = sorted(day for day, total in daily.items() if abs(total) > 1e-9)
+        self.values = [daily[day] for day in self.days]
+        self._png = None
+        self.draw()
+
+    def _patch(self, daily: Dict[str, float]):
+        for day, total in daily.items():
+            i = bisect_left(self.days, day)
+            present = i < len(self.days) and self.days[i] == day
+            if abs(total) <= 1e-9:
+                if present:
+                    del self.days[i]
+                    del self.values[i]
+            elif present:
+                self.values[i] = total
+            else:
+                self.days.insert(i, day)
+                self.values.insert(i, total)
+
+    def update(self, tracker) -> bool:
+        """Sync with ``tracker``; returns False when nothing needed redrawing"""
+        if tracker.version == self.version:
+            return False
+        changed = tracker.changed_days(self.version) if self.version is not None else None
+        self.version = tracker.version
+        if changed is None:
+            self.set_data(tracker.get_daily_totals('expense'))
+            return True
+        if not changed:
+            return False
+        self._patch(tracker.get_daily_totals('expense', changed))
+        self._png = None
+        self.draw()
+        return True
+
+    def render_png(self) -> bytes:
+        """The figure as PNG, rendered again only after the data changed"""
+        if self._png is None:
+            buffer = io.BytesIO()
+            self.figure.savefig(buffer, format='png')
+            self._png = buffer.getvalue()
+        return self._png
+
+    def close(self):
+        self.figure.clear()
+
+
+class SpendingHeatmap(DailyChart):
+    """Color-coded spending intensity map"""
+
+    figsize = (10, 2)
+
+    def setup(self):
+        self.image = self.ax.imshow([[0.0]], cmap=MONEY_CMAP, aspect='auto', extent=[0, 1, 0, 1])
+        self.figure.colorbar(self.image, ax=self.ax, orientation='horizontal',
+                             label='Spending Amount')
+        self.ax.set_yticks([])  # Hide y-axis
+        self.figure.tight_layout()
+
+    def draw(self):
+        if self.empty:
+            return
+        values = np.asarray(self.values)
+        self.image.set_data(values[np.newaxis, :])
+        self.image.set_extent([0, len(values), 0, 1])
+        self.image.set_clim(values.min(), values.max())
+
+        # Label at most MAX_TICKS days so long histories stay readable
+        step = max(1, -(-len(self.days) // MAX_TICKS))
+        ticks = range(0, len(self.days), step)
+        self.ax.set_xticks(list(ticks))
+        self.ax.set_xticklabels([date.fromisoformat(self.days[i]).strftime('%b %d') for i in ticks],
+                                rotation=45)
+
+
+class SpendingSparkline(DailyChart):
+    """Mini spending trend line"""
+
+    def setup(self):
+        self.line, = self.ax.plot([], [], color='#e74c3c', linewidth=2)
+        self.fill = None
+        self.ax.axis('off')
+        self.figure.patch.set_alpha(0)
+        self.figure.tight_layout()
+
+    def draw(self):
+        if self.fill is not None:
+            self.fill.remove()
+            self.fill = None
+        if self.empty:
+            return
+        x = np.arange(len(self.values))
+        self.line.set_data(x, self.values)
+        self.fill = self.ax.fill_between(x, self.values, color='#e74c3c', alpha=0.2)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+
+class BalanceChart(DailyChart):
+    """Running balance over time, one point per calendar day"""
+
+    def setup(self):
+        self.line, = self.ax.plot([], [], color='#3498db', linewidth=2)
+        self.ax.axhline(0, color='#95a5a6', linewidth=0.5)
+        self.ax.axis('off')
+        self.figure.patch.set_alpha(0)
+        self.figure.tight_layout()
+
+    def update(self, tracker) -> bool:
+        # A back-dated change moves every later balance, so always take the
+        # whole series; the tracker builds it from prefix sums in one pass
+        if tracker.version == self.version:
+            return False
+        self.version = tracker.version
+        history = tracker.balance_history()
+        self.days = list(history)
+        self.values = list(history.values())
+        self._png = None
+        self.draw()
+        return True
+
+    def draw(self):
+        if self.empty:
+            return
+        self.line.set_data(np.arange(len(self.values)), self.values)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
 
 def create_spending_heatmap(transactions):
     """Generate color-coded spending intensity map"""
     try:
-        df = pd.DataFrame(transactions)
-        if df.empty:
-            return None
-            
-        expenses = df[df['type'] == 'expense'].copy()
-        if expenses.empty:
+        daily = _daily_expenses(transactions)
+        if not daily:
             return None
-            
-        expenses['date'] = pd.to_datetime(expenses['date'])
-        daily = expenses.groupby('date')['amount'].sum()
-        
-        # Create custom color gradient (green -> yellow -> red)
-        colors = ["#2ecc71", "#f1c40f", "#e74c3c"]
-        cmap = LinearSegmentedColormap.from_list("money", colors)
-        
-        # Plot setup
-        fig, ax = plt.subplots(figsize=(10, 2))
-        img = ax.imshow([daily.values], cmap=cmap, aspect='auto',
-                       extent=[0, len(daily), 0, 1])
-        
-        # Add colorbar
-        plt.colorbar(img, ax=ax, orientation='horizontal', label='Spending Amount')
-        
-        # X-axis formatting
-        if len(daily) > 0:
-            ax.set_xticks(range(len(daily)))
-            ax.set_xticklabels([d.strftime('%b %d') for d in daily.index], rotation=45)
-        ax.set_yticks([])  # Hide y-axis
-        
-        plt.tight_layout()
-        return fig
+        chart = SpendingHeatmap()
+        chart.set_data(daily)
+        return chart.figure
     except Exception as e:
         print(f"Heatmap generation error: {e}")
         return None
@@ -43,24 +207,12 @@ def create_spending_heatmap(transactions):
 def create_spending_sparkline(transactions):
     """Generate mini spending trend visualization"""
     try:
-        df = pd.DataFrame(transactions)
-        if df.empty:
+        daily = _daily_expenses(transactions)
+        if not daily:
             return None
-            
-        expenses = df[df['type'] == 'expense']
-        if expenses.empty:
-            return None
-            
-        expenses['date'] = pd.to_datetime(expenses['date'])
-        daily = expenses.groupby('date')['amount'].sum()
-        
-        fig, ax = plt.subplots(figsize=(4, 1))
-        ax.plot(daily.values, color='#e74c3c', linewidth=2)
-        ax.fill_between(range(len(daily)), daily.values, color='#e74c3c', alpha=0.2)
-        ax.axis('off')
-        fig.patch.set_alpha(0)
-        plt.tight_layout()
-        return fig
+        chart = SpendingSparkline()
+        chart.set_data(daily)
+        return chart.figure
     except Exception as e:
         print(f"Sparkline generation error: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,99 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class Job:
+    """Handle a running job uses to check for cancellation and post results"""
+
+    def __init__(self, worker: Optional["BackgroundWorker"] = None, generation: int = 0):
+        self.worker = worker
+        self.generation = generation
+        self.cancelled = threading.Event()
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def post(self, callback: Callable, result):
+        """Deliver ``callback(result)`` on the Tk thread, unless the job went stale.
+
+        Without a worker (a job run inline on the Tk thread) it is called
+        straight away.
+        """
+        if self.worker is None:
+            callback(result)
+        elif not self.cancelled.is_set():
+            self.worker.results.put((self.generation, callback, result))
+
+
+class BackgroundWorker:
+    """Runs jobs off the Tk event loop and hands back only the newest results.
+
+    ``submit(func, callback, *args)`` calls ``func(*args, job)`` on a worker
+    thread, where ``job`` is a ``Job`` the function may poll to bail out
+    early and use to post partial results. Submitting again cancels the
+    previous job: if it has not started it never runs, otherwise its results
+    are dropped. The return value goes to ``callback``. Callbacks run on the
+    Tk thread, polled with ``root.after`` because Tk must not be touched
+    from other threads.
+    """
+
+    def __init__(self, root, poll_ms: int = 30):
+        self.root = root
+        self.poll_ms = poll_ms
+        # One thread: jobs share state (chart figures) and run in order
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refresh")
+        self.results = queue.Queue()
+        self.generation = 0
+        self.future = None
+        self.job: Optional[Job] = None
+        self.polling = None
+
+    def submit(self, func: Callable, callback: Callable, *args):
+        self.cancel()
+        self.generation += 1
+        job = self.job = Job(self, self.generation)
+
+        def run():
+            try:
+                result = func(*args, job)
+            except Exception as e:
+                print(f"Background job error: {e}")
+                return
+            job.post(callback, result)
+
+        self.future = self.executor.submit(run)
+        if self.polling is None:
+            self.polling = self.root.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+            self.job.cancelled.set()
+            self.future = None
+
+    def drain(self):
+        """Cancel pending work and wait for a job already running to finish"""
+        self.cancel()
+        self.executor.submit(lambda: None).result()
+
+    def _poll(self):
+        self.polling = None
+        while True:
+            try:
+                generation, callback, result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation == self.generation:
+                callback(result)
+        # A job may finish right after the queue was drained
+        if not self.results.empty() or (self.future is not None and not self.future.done()):
+            self.polling = self.root.after(self.poll_ms, self._poll)
+
+    def shutdown(self):
+        self.cancel()
+        if self.polling is not None:
+            self.root.after_cancel(self.polling)
+            self.polling = None
+        self.executor.shutdown(wait=False, cancel_futures=True)